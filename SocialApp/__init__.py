@@ -1,8 +1,17 @@
 # myproject/__init__.py
 
-from __future__ import absolute_import, unicode_literals
 
-# Make sure the app is always imported when Django starts
-from .celery import app as celery_app
+# The Celery app is imported on first use rather than with the package, so
+# web workers, tests and management commands don't pay for importing celery
+# and kombu. Everything that publishes tasks goes through core.outbox, which
+# imports SocialApp.celery itself, and `celery -A SocialApp` finds the app in
+# SocialApp.celery.
+def __getattr__(name):
+    if name == "celery_app":
+        from .celery import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ("celery_app",)
@@ -5,20 +5,54 @@ from __future__ import absolute_import, unicode_literals
 import os
 
 from celery import Celery
+from celery import Task as BaseTask
+from kombu import Queue
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SocialApp.settings")
 
-app = Celery("SocialApp")
+
+class Task(BaseTask):
+    """
+    Base class for all project tasks.
+
+    Results are ignored unless a task opts in with ``ignore_result=False``.
+    Such tasks can set ``result_ttl`` (seconds) to keep their result for a
+    shorter time than CELERY_RESULT_EXPIRES.
+    """
+
+    result_ttl = None
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        if self.ignore_result or self.result_ttl is None:
+            return
+        # Only key/value backends such as Redis support per-key expiry.
+        expire = getattr(self.backend, "expire", None)
+        if expire is not None:
+            expire(self.backend.get_key_for_task(task_id), self.result_ttl)
+
+
+app = Celery("SocialApp", task_cls=Task)
 
 # Use a string here to avoid pickle issues with Windows
 # Configure Celery using settings from Django
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
+# One queue per workload. Run a dedicated worker per queue so each one gets
+# its own concurrency and a slow queue can't starve the others:
+#
+#   celery -A SocialApp worker -n fanout@%h -Q fanout,default --autoscale=16,4 -O fair
+#   celery -A SocialApp worker -n notifications@%h -Q notifications --autoscale=8,1 -O fair
+#   celery -A SocialApp worker -n maintenance@%h -Q maintenance -c 1
+app.conf.task_queues = [
+    Queue(name, routing_key=name, queue_arguments={"x-max-priority": 10})
+    for name in ("default", "notifications", "fanout", "maintenance")
+]
+
 # Autodiscover tasks in all registered Django apps
 app.autodiscover_tasks()
 
 
-@app.task(bind=True)
+@app.task(bind=True, ignore_result=False, result_ttl=300)
 def debug_task(self):
     print("Request: {0!r}".format(self.request))
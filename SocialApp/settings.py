@@ -70,6 +70,9 @@ INSTALLED_APPS = [
 #     'USER_ID_CLAIM': 'user_id',
 # }
 MIDDLEWARE = [
+    "core.profiling.SamplingProfilerMiddleware",
+    "core.querylog.SlowQueryLogMiddleware",
+    "core.compression.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -166,9 +169,110 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.activity.ActivityTrackingJWTAuthentication",
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_THROTTLE_CLASSES": ["core.throttling.TokenBucketThrottle"],
+}
+
+# A shared cache is needed for idempotency keys and cached counts to work
+# across worker processes; without REDIS_CACHE_URL each process has its own.
+if os.getenv("REDIS_CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_CACHE_URL"),
+        }
+    }
+
+# Stored responses for Idempotency-Key retries, and how long a key stays
+# locked while its first request runs (seconds).
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# How long nested user summaries (id, names, email, gender) stay cached;
+# saving a user drops its entry.
+USER_SUMMARY_TTL = 60 * 60
+
+# Accounts every new user follows, the processes the provision_users command
+# hashes passwords in, and the most users one provisioning request may create
+# (hashed in the request, within gunicorn's 30s timeout).
+DEFAULT_FOLLOW_EMAILS = [
+    email for email in os.getenv("DEFAULT_FOLLOW_EMAILS", "").split(",") if email
+]
+PROVISION_HASH_WORKERS = os.cpu_count() or 1
+PROVISION_MAX_API_ROWS = 50
+
+# Last-seen tracking for authenticated requests. The local tracker flushes
+# from each web process every flush_interval seconds; switch BACKEND to
+# authentication.activity.RedisActivityTracker (OPTIONS: {"url": ...}) for
+# exact online counts across processes, flushed by the flush-activity task.
+ACTIVITY_TRACKING = {
+    "BACKEND": "authentication.activity.LocalActivityTracker",
+    "OPTIONS": {"flush_interval": 30},
+}
+# Seconds since the last request for a user to count as online, and days
+# without one before deactivate_inactive_users disables an account.
+ONLINE_WINDOW = 5 * 60
+INACTIVE_ACCOUNT_DAYS = 365
+
+# Sampling profiler (core.profiling). Off unless PROFILING=on. Requests
+# sending "X-Profile: <PROFILING_TOKEN>" are profiled; with SLOW_THRESHOLD
+# (seconds) every request is sampled and kept if slower than that. Collapsed
+# stacks per URL name go to OUTPUT_DIR.
+PROFILING = {
+    "ENABLED": os.getenv("PROFILING") == "on",
+    "HEADER": "X-Profile",
+    "TOKEN": os.getenv("PROFILING_TOKEN"),
+    "SLOW_THRESHOLD": None,
+    "INTERVAL": 0.005,
+    "OUTPUT_DIR": BASE_DIR / "profiles",
+}
+
+# Slow query log (core.querylog). Off unless SLOW_QUERY_LOG=on. Queries over
+# THRESHOLD_MS are logged with their fingerprint and call site and
+# aggregated per fingerprint (with the EXPLAIN plan of the first sighting)
+# for /api/debug/slow-queries/.
+SLOW_QUERY_LOG = {
+    "ENABLED": os.getenv("SLOW_QUERY_LOG") == "on",
+    "THRESHOLD_MS": 100,
+    "EXPLAIN": True,
+    "MAX_FINGERPRINTS": 1000,
+}
+
+# Response compression (core.compression): br when the brotli package is
+# installed and the client accepts it, else gzip, for text and JSON bodies of
+# at least MIN_SIZE bytes.
+COMPRESSION = {
+    "MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 5,
+    "ENCODINGS": ["br", "gzip"],
+}
+
+# Rows deleted per transaction when purging soft-deleted posts and users.
+PURGE_BATCH_SIZE = 1000
+
+# Likes and comments older than this move to the archive tables.
+ARCHIVE_AFTER_DAYS = 180
+
+# /api/batch/ limits: sub-requests per batch and threads for parallel ones.
+BATCH_MAX_REQUESTS = 50
+BATCH_MAX_WORKERS = 4
+
+# Token bucket limits for write endpoints, keyed by URL name. Switch BACKEND
+# to core.throttling.RedisTokenBucketBackend (OPTIONS: {"url": ...}) to
+# share the limits between worker processes.
+TOKEN_BUCKET_THROTTLE = {
+    "BACKEND": "core.throttling.LocalTokenBucketBackend",
+    "OPTIONS": {},
+    "RATES": {
+        "postcreate": "30/min",
+        "commentcreate": "60/min",
+        "likecreate": "120/min",
+        "followercreate": "60/min",
+        "studentimport": "10/hour",
+    },
 }
 
 SIMPLE_JWT = {
@@ -176,6 +280,17 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+# How login and signup record the OutstandingToken row the blacklist needs.
+# "sync" inserts it before responding. "buffered" hands it to BACKEND and
+# writes rows in bulk: LocalOutstandingTokenBuffer flushes from a thread in
+# each web process, RedisOutstandingTokenBuffer (OPTIONS: {"url": ...}) keeps
+# them in Redis until the flush-outstanding-tokens beat task runs.
+TOKEN_ISSUANCE = {
+    "MODE": os.getenv("TOKEN_ISSUANCE_MODE", "sync"),
+    "BACKEND": "authentication.tokens.LocalOutstandingTokenBuffer",
+    "OPTIONS": {"batch_size": 500, "flush_interval": 5},
+}
+
 # settings.py
 
 # Celery Configuration
@@ -185,6 +300,71 @@ CELERY_TASK_SERIALIZER = "json"  # Serialize tasks as JSON
 CELERY_RESULT_BACKEND = "redis://localhost:6379/0"  # Store results in Redis
 CELERY_TIMEZONE = "UTC"  # Set the timezone
 
+# Tasks are fire-and-forget unless they opt in with ignore_result=False.
+# Stored results carry the task name (for celery_result_stats) and expire
+# after a day unless the task sets a shorter result_ttl.
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_RESULT_EXTENDED = True
+CELERY_RESULT_EXPIRES = timedelta(days=1)
+
+# Named queues so a backlog of slow email tasks can't delay fan-out and
+# counter work. The queues and their workers are declared in
+# SocialApp/celery.py.
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "core.tasks.send_post_creation_email": {"queue": "notifications"},
+    "core.tasks.send_comment_creation_email": {"queue": "notifications"},
+    "core.tasks.send_welcome_emails": {"queue": "notifications"},
+    "core.tasks.create_default_follows": {"queue": "fanout"},
+    "core.tasks.purge_*": {"queue": "maintenance"},
+    "core.tasks.archive_*": {"queue": "maintenance"},
+}
+CELERY_BEAT_SCHEDULE = {
+    "purge-soft-deleted": {
+        "task": "core.tasks.purge_soft_deleted",
+        "schedule": timedelta(hours=1),
+    },
+    "archive-old-activity": {
+        "task": "core.tasks.archive_old_activity",
+        "schedule": timedelta(days=1),
+    },
+    "flush-outstanding-tokens": {
+        "task": "authentication.tasks.flush_outstanding_tokens",
+        "schedule": timedelta(seconds=10),
+    },
+    "flush-activity": {
+        "task": "authentication.tasks.flush_activity",
+        "schedule": timedelta(seconds=30),
+    },
+}
+# Per-task rate limits, enforced by the worker consuming the task.
+CELERY_TASK_ANNOTATIONS = {
+    "core.tasks.send_post_creation_email": {"rate_limit": "60/m"},
+    "core.tasks.send_comment_creation_email": {"rate_limit": "120/m"},
+}
+# Acknowledge after the task ran so a crashed worker re-delivers it, and
+# only reserve one message per process so long tasks don't hoard the queue.
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "queue_order_strategy": "priority",
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    # Must exceed the longest task runtime, otherwise acks_late tasks are
+    # re-delivered while they are still running.
+    "visibility_timeout": 3600,
+}
+
+# Local/test profile: run tasks inline with an in-memory transport so no
+# Redis is needed. Enable with CELERY_PROFILE=local.
+if os.getenv("CELERY_PROFILE") == "local":
+    CELERY_BROKER_URL = "memory://"
+    CELERY_RESULT_BACKEND = "cache+memory://"
+    CELERY_TASK_ALWAYS_EAGER = True
+    CELERY_TASK_EAGER_PROPAGATES = True
+
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = "smtp.gmail.com"
@@ -0,0 +1,135 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from authentication.models import User
+from core.backends import FlushThread, cached_setting, load_backend
+
+
+def _write(last_seen):
+    """
+    Store ``{user id: unix time}`` in User.last_seen_at with bulk updates.
+    """
+    users = [
+        User(pk=user_id, last_seen_at=datetime.fromtimestamp(ts, dt_timezone.utc))
+        for user_id, ts in last_seen.items()
+    ]
+    User.objects.bulk_update(users, ["last_seen_at"], batch_size=500)
+
+
+class LocalActivityTracker:
+    """
+    Last-seen times kept in process memory, one entry per user however many
+    requests they make, and written every ``flush_interval`` seconds by a
+    background thread. Online counts are read from the database, so they lag
+    by up to the flush interval.
+    """
+
+    def __init__(self, flush_interval=30, **options):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = FlushThread(
+            self.flush, flush_interval, "Writing last seen times failed"
+        )
+
+    def record(self, user_id, ts=None):
+        with self._lock:
+            self._pending[user_id] = ts or time.time()
+        self._flusher.ensure_started()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if pending:
+            try:
+                _write(pending)
+            except Exception:
+                # Keep them for the next flush, behind any newer times.
+                with self._lock:
+                    self._pending = {**pending, **self._pending}
+                raise
+        return len(pending)
+
+    def online_count(self, window):
+        since = timezone.now() - timedelta(seconds=window)
+        return User.objects.filter(last_seen_at__gte=since).count()
+
+
+class RedisActivityTracker:
+    """
+    Last-seen times in Redis: a hash of updates waiting for the flush-activity
+    beat task, and a sorted set by time for exact online counts across all
+    workers.
+    """
+
+    def __init__(self, url="redis://localhost:6379/0", prefix="activity:", **options):
+        import redis
+
+        self.client = redis.Redis.from_url(url, **options)
+        self.pending_key = prefix + "pending"
+        self.seen_key = prefix + "seen"
+
+    def record(self, user_id, ts=None):
+        ts = ts or time.time()
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(self.pending_key, user_id, ts)
+        pipe.zadd(self.seen_key, {user_id: ts})
+        pipe.execute()
+
+    def flush(self):
+        pipe = self.client.pipeline()
+        pipe.hgetall(self.pending_key)
+        pipe.delete(self.pending_key)
+        pending, _ = pipe.execute()
+        # Online counts only look back ONLINE_WINDOW; drop older members.
+        self.client.zremrangebyscore(
+            self.seen_key, "-inf", time.time() - settings.ONLINE_WINDOW
+        )
+        if pending:
+            try:
+                _write({int(user_id): float(ts) for user_id, ts in pending.items()})
+            except Exception:
+                # Put them back unless a newer time came in meanwhile.
+                pipe = self.client.pipeline(transaction=False)
+                for user_id, ts in pending.items():
+                    pipe.hsetnx(self.pending_key, user_id, ts)
+                pipe.execute()
+                raise
+        return len(pending)
+
+    def online_count(self, window):
+        return self.client.zcount(self.seen_key, time.time() - window, "+inf")
+
+
+@cached_setting("ACTIVITY_TRACKING")
+def get_tracker():
+    """
+    Return the tracker built from the ACTIVITY_TRACKING setting.
+    """
+    config = getattr(settings, "ACTIVITY_TRACKING", {})
+    return load_backend(config, "authentication.activity.LocalActivityTracker")
+
+
+def online_count(window=None):
+    """
+    Number of users seen in the last ``window`` seconds (ONLINE_WINDOW).
+    """
+    return get_tracker().online_count(window or settings.ONLINE_WINDOW)
+
+
+class ActivityTrackingJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that records the user as seen on every authenticated
+    request, in the tracker rather than the database.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            get_tracker().record(result[0].pk)
+        return result
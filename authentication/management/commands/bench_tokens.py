@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from authentication.models import User
+from authentication.tokens import get_buffer
+from authentication.views import get_tokens_for_user
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare token pairs minted per second with the OutstandingToken row "
+        "inserted inline (sync) and buffered. The buffered time includes "
+        "the final flush."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5000)
+        parser.add_argument(
+            "--redis-url",
+            help="Also benchmark RedisOutstandingTokenBuffer against this server.",
+        )
+
+    def handle(self, *args, **options):
+        configs = {
+            "sync": {"MODE": "sync"},
+            "buffered (local)": {
+                "MODE": "buffered",
+                "BACKEND": "authentication.tokens.LocalOutstandingTokenBuffer",
+                # Flush only on a full batch or at the end, not from a thread.
+                "OPTIONS": {"batch_size": 500, "flush_interval": None},
+            },
+        }
+        if options["redis_url"]:
+            configs["buffered (redis)"] = {
+                "MODE": "buffered",
+                "BACKEND": "authentication.tokens.RedisOutstandingTokenBuffer",
+                "OPTIONS": {"url": options["redis_url"], "key": "bench-tokens"},
+            }
+
+        user = User.objects.create_user(
+            email="bench-tokens@example.invalid",
+            first_name="Bench",
+            last_name="Tokens",
+            gender="M",
+        )
+        iterations = options["iterations"]
+        try:
+            for name, config in configs.items():
+                with override_settings(TOKEN_ISSUANCE=config):
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        get_tokens_for_user(user)
+                    minted = time.perf_counter() - started
+                    if get_buffer() is not None:
+                        get_buffer().flush()
+                    elapsed = time.perf_counter() - started
+                recorded = OutstandingToken.objects.filter(user=user).count()
+                OutstandingToken.objects.filter(user=user).delete()
+                self.stdout.write(
+                    f"{name}: {iterations / elapsed:,.0f} pairs/s "
+                    f"({minted / iterations * 1e6:.0f}us per login, "
+                    f"{elapsed:.2f}s with flush), {recorded} rows recorded"
+                )
+        finally:
+            OutstandingToken.objects.filter(user=user).delete()
+            user.delete()
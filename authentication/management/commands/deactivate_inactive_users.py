@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from authentication.activity import get_tracker
+from authentication.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Deactivate accounts with no authenticated request for --days "
+        "(INACTIVE_ACCOUNT_DAYS). Accounts never seen, including those from "
+        "before activity tracking, count from their last login or update. "
+        "Admins are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.INACTIVE_ACCOUNT_DAYS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        # Write pending last-seen times first so recent activity counts.
+        get_tracker().flush()
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        inactive = User.objects.alias(
+            last_active=Coalesce("last_seen_at", "last_login", "updated_at")
+        ).filter(
+            last_active__lt=cutoff,
+            is_active=True,
+            is_admin=False,
+            deleted_at__isnull=True,
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{inactive.count()} accounts would be deactivated")
+            return
+
+        deactivated = 0
+        while ids := list(
+            inactive.values_list("pk", flat=True)[: options["batch_size"]]
+        ):
+            deactivated += User.objects.filter(pk__in=ids).update(is_active=False)
+        self.stdout.write(self.style.SUCCESS(f"Deactivated {deactivated} accounts"))
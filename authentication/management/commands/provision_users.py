@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.provisioning import provision_users
+from core.importers import iter_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users in bulk from a CSV or JSONL file with email, first_name, "
+        "last_name, gender and password columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Defaults to the file extension.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PROVISION_HASH_WORKERS,
+            help="Processes hashing passwords.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        if fmt not in ("csv", "jsonl"):
+            raise CommandError("Pass --format csv or --format jsonl")
+
+        with path.open("rb") as stream:
+            report = provision_users(
+                iter_rows(stream, fmt),
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+            ).as_dict()
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['msg']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report['rows']} rows, {report['users']} users, "
+                f"{report['skipped']} skipped in {report['seconds']}s "
+                f"({report['rows_per_second']} rows/s)"
+            )
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0002_soft_delete"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="last_seen_at",
+            field=models.DateTimeField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+    ]
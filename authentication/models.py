@@ -71,6 +71,14 @@ class User(AbstractBaseUser):
     is_admin = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set together with is_active=False when the account is deleted; the row
+    # and its content are removed later by core.tasks.purge_deleted_user.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Last authenticated request, written in bulk by authentication.activity
+    # so it lags by up to a flush interval.
+    last_seen_at = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True
+    )
     objects = UserManager()
 
     USERNAME_FIELD = "email"
@@ -0,0 +1,134 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from authentication.models import User
+from core import outbox
+from core.importers import ImportReport, chunked
+
+GENDERS = {gender for gender, _ in User.GENDER_CHOICES}
+
+
+class ProvisionReport(ImportReport):
+    def __init__(self):
+        super().__init__()
+        self.users = 0
+
+    def as_dict(self):
+        report = super().as_dict()
+        del report["students"], report["enrollments"]
+        report["users"] = self.users
+        return report
+
+
+def _init_worker():
+    # Spawned workers start without Django; forked ones already have it.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SocialApp.settings")
+    django.setup()
+
+
+def _hash_passwords(passwords, pool, workers):
+    if pool is None:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def _clean(line, row, report):
+    if not isinstance(row, dict):
+        report.error(line, "Malformed row")
+        return None
+    user = {
+        field: str(row.get(field) or "").strip()
+        for field in ("email", "first_name", "last_name", "gender")
+    }
+    password = row.get("password")
+    if not all(user.values()) or not password:
+        report.error(
+            line, "email, first_name, last_name, gender and password are required"
+        )
+        return None
+    try:
+        validate_email(user["email"])
+    except ValidationError:
+        report.error(line, f"Invalid email {user['email']!r}")
+        return None
+    if user["gender"] not in GENDERS:
+        report.error(line, f"Invalid gender {user['gender']!r}")
+        return None
+    user["email"] = User.objects.normalize_email(user["email"])
+    return user, str(password)
+
+
+def provision_users(rows, chunk_size=1000, workers=1):
+    """
+    Create users from ``(line, row)`` pairs with email, first_name,
+    last_name, gender and password.
+
+    Rows whose email already exists, or is taken concurrently, are skipped.
+    Passwords are hashed across ``workers`` processes, or in this one when
+    ``workers`` is 1 (web requests must not fork a threaded server worker).
+    Each chunk is written with one bulk insert, and the welcome emails and
+    default follows for the chunk are handed to Celery as two batched tasks
+    through the outbox.
+    """
+    report = ProvisionReport()
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        for chunk in chunked(rows, chunk_size):
+            report.rows += len(chunk)
+            users = {}
+            lines = {}
+            for line, row in chunk:
+                cleaned = _clean(line, row, report)
+                if cleaned is None:
+                    continue
+                user, password = cleaned
+                if user["email"] in users:
+                    report.error(line, f"Email {user['email']!r} repeated")
+                    continue
+                lines[user["email"]] = line
+                users[user["email"]] = (user, password)
+
+            taken = User.objects.filter(email__in=users).values_list("email", flat=True)
+            for email in taken:
+                report.error(lines[email], f"Email {email!r} already exists")
+                del users[email]
+            if not users:
+                continue
+
+            hashes = _hash_passwords(
+                [password for _, password in users.values()], pool, workers
+            )
+            objs = [
+                User(password=hashed, **user)
+                for (user, _), hashed in zip(users.values(), hashes)
+            ]
+            with transaction.atomic():
+                # An email taken since the check above is skipped by the
+                # insert; the salted hash tells our rows from the other ones.
+                User.objects.bulk_create(objs, ignore_conflicts=True)
+                passwords = {user.email: user.password for user in objs}
+                user_ids = []
+                for pk, email, password in User.objects.filter(
+                    email__in=passwords
+                ).values_list("pk", "email", "password"):
+                    if password == passwords[email]:
+                        user_ids.append(pk)
+                    else:
+                        report.error(lines[email], f"Email {email!r} already exists")
+                if user_ids:
+                    outbox.enqueue("core.tasks.send_welcome_emails", user_ids)
+                    outbox.enqueue("core.tasks.create_default_follows", user_ids)
+            report.users += len(user_ids)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return report
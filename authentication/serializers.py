@@ -1,6 +1,8 @@
+from django.db import models
 from rest_framework import serializers
 
 from authentication.models import User
+from authentication.summaries import get_summaries
 
 
 class UserSignupSerializer(serializers.ModelSerializer):
@@ -43,3 +45,48 @@ class UserDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "first_name", "last_name", "email", "gender"]
+
+
+class UserSummaryField(serializers.Field):
+    """
+    Read-only nested user rendered from the cached summary, like
+    UserDataSerializer, without loading the related User row. Only the
+    foreign key column is read from the instance. Put the parent serializer
+    on UserSummaryListSerializer so a page resolves its users in one
+    multi-get.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, f"{self.source}_id")
+
+    def to_representation(self, user_id):
+        summaries = self.context.get("user_summaries")
+        if summaries is None or user_id not in summaries:
+            summaries = get_summaries([user_id])
+        return summaries.get(user_id)
+
+
+class UserSummaryListSerializer(serializers.ListSerializer):
+    """
+    Fetches the summaries for every UserSummaryField of every item up front,
+    so the child fields find them in the context.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        data = list(data)
+        fields = [
+            field
+            for field in self.child.fields.values()
+            if isinstance(field, UserSummaryField)
+        ]
+        user_ids = {field.get_attribute(item) for item in data for field in fields}
+        user_ids.discard(None)
+        if user_ids:
+            self.context["user_summaries"] = get_summaries(user_ids)
+        return super().to_representation(data)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from authentication.models import User
+
+FIELDS = ["id", "first_name", "last_name", "email", "gender"]
+
+
+def _key(user_id):
+    return f"user-summary:{user_id}"
+
+
+def get_summaries(user_ids):
+    """
+    Return ``{id: summary}`` for ``user_ids``, where a summary is the dict
+    UserDataSerializer would render. Hits come from one cache multi-get; the
+    misses are loaded with a single in_bulk and cached for USER_SUMMARY_TTL
+    seconds. Unknown and soft-deleted ids are left out.
+    """
+    user_ids = set(user_ids)
+    cached = cache.get_many([_key(user_id) for user_id in user_ids])
+    summaries = {summary["id"]: summary for summary in cached.values()}
+    missing = user_ids - summaries.keys()
+    if missing:
+        live = User.objects.filter(deleted_at__isnull=True).only(*FIELDS)
+        loaded = {
+            user.pk: {field: getattr(user, field) for field in FIELDS}
+            for user in live.in_bulk(missing).values()
+        }
+        cache.set_many(
+            {_key(user_id): summary for user_id, summary in loaded.items()},
+            settings.USER_SUMMARY_TTL,
+        )
+        summaries.update(loaded)
+    return summaries
+
+
+def invalidate(sender, instance, **kwargs):
+    cache.delete(_key(instance.pk))
+
+
+post_save.connect(invalidate, sender=User)
+post_delete.connect(invalidate, sender=User)
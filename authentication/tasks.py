@@ -0,0 +1,19 @@
+from celery import shared_task
+
+from authentication.activity import get_tracker
+from authentication.tokens import get_buffer
+
+
+# Writes buffered OutstandingToken rows; a no-op when tokens are recorded
+# synchronously.
+@shared_task
+def flush_outstanding_tokens():
+    buffer = get_buffer()
+    return buffer.flush() if buffer is not None else 0
+
+
+# Writes buffered last-seen times. Only the Redis tracker needs it; the
+# local one flushes from a thread in each web process.
+@shared_task
+def flush_activity():
+    return get_tracker().flush()
@@ -0,0 +1,144 @@
+import json
+import threading
+
+from django.conf import settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from core.backends import FlushThread, cached_setting, load_backend
+
+
+def _write(records):
+    """
+    Insert ``[user_id, jti, token, iat, exp]`` records as OutstandingToken
+    rows. Tokens blacklisted before their row was written already have one,
+    so conflicts on jti are ignored.
+    """
+    OutstandingToken.objects.bulk_create(
+        [
+            OutstandingToken(
+                user_id=user_id,
+                jti=jti,
+                token=token,
+                created_at=datetime_from_epoch(iat),
+                expires_at=datetime_from_epoch(exp),
+            )
+            for user_id, jti, token, iat, exp in records
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class LocalOutstandingTokenBuffer:
+    """
+    Outstanding tokens buffered in process memory and written in bulk every
+    ``flush_interval`` seconds by a background thread, or as soon as
+    ``batch_size`` are pending. Tokens still buffered when the process is
+    killed are never recorded; they keep working and can still be
+    blacklisted, they are just missing from the outstanding list.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=5, **options):
+        self.batch_size = batch_size
+        self._records = []
+        self._lock = threading.Lock()
+        self._flusher = FlushThread(
+            self.flush, flush_interval, "Writing outstanding tokens failed"
+        )
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+            full = len(self._records) >= self.batch_size
+        self._flusher.ensure_started()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            records, self._records = self._records, []
+        if records:
+            try:
+                _write(records)
+            except Exception:
+                # Keep them for the next flush; a lost record can't be
+                # blacklisted.
+                with self._lock:
+                    self._records[:0] = records
+                raise
+        return len(records)
+
+
+class RedisOutstandingTokenBuffer:
+    """
+    Outstanding tokens pushed as compact JSON onto a Redis list that expires
+    with the refresh token lifetime. The flush_outstanding_tokens beat task
+    drains it into the database in batches, so records survive web worker
+    restarts.
+    """
+
+    def __init__(
+        self,
+        url="redis://localhost:6379/0",
+        key="outstanding-tokens",
+        batch_size=500,
+        **options,
+    ):
+        import redis
+
+        self.client = redis.Redis.from_url(url, **options)
+        self.key = key
+        self.batch_size = batch_size
+        self.ttl = int(settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds())
+
+    def add(self, record):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(self.key, json.dumps(record, separators=(",", ":")))
+        pipe.expire(self.key, self.ttl)
+        pipe.execute()
+
+    def flush(self):
+        flushed = 0
+        while raw := self.client.lpop(self.key, self.batch_size):
+            try:
+                _write([json.loads(record) for record in raw])
+            except Exception:
+                self.client.rpush(self.key, *raw)
+                raise
+            flushed += len(raw)
+        return flushed
+
+
+@cached_setting("TOKEN_ISSUANCE")
+def get_buffer():
+    """
+    Return the outstanding token buffer built from the TOKEN_ISSUANCE setting,
+    or None when tokens are recorded synchronously.
+    """
+    config = getattr(settings, "TOKEN_ISSUANCE", {})
+    if config.get("MODE", "sync") != "buffered":
+        return None
+    return load_backend(config, "authentication.tokens.LocalOutstandingTokenBuffer")
+
+
+class BufferedRefreshToken(RefreshToken):
+    """
+    RefreshToken whose OutstandingToken row is handed to the buffer instead
+    of being inserted while the client waits.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which inserts the row inline.
+        token = super(BlacklistMixin, cls).for_user(user)
+        get_buffer().add(
+            [user.pk, token["jti"], str(token), token["iat"], token["exp"]]
+        )
+        return token
+
+
+def refresh_token_for(user):
+    if get_buffer() is None:
+        return RefreshToken.for_user(user)
+    return BufferedRefreshToken.for_user(user)
@@ -1,9 +1,19 @@
 from django.urls import path
 
-from authentication.views import UserLogin, UserLogout, UserSignup
+from authentication.views import (
+    UserDelete,
+    UserLogin,
+    UserLogout,
+    UserOnline,
+    UserProvision,
+    UserSignup,
+)
 
 urlpatterns = [
     path("signup/", UserSignup.as_view(), name="signup"),
     path("login/", UserLogin.as_view(), name="login"),
     path("logout/", UserLogout.as_view(), name="logout"),
+    path("delete/", UserDelete.as_view(), name="userdelete"),
+    path("provision/", UserProvision.as_view(), name="userprovision"),
+    path("online/", UserOnline.as_view(), name="useronline"),
 ]
@@ -1,17 +1,28 @@
+from itertools import islice
+
+from django.conf import settings
 from django.contrib.auth import authenticate
+from django.db import transaction
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from authentication.activity import online_count
+from authentication.provisioning import provision_users
 from authentication.renderers import UserRenderer
 from authentication.serializers import UserLoginSerializer, UserSignupSerializer
+from authentication.tokens import refresh_token_for
+from core import outbox
+from core.deletion import soft_delete_user
+from core.importers import iter_rows
 
 
 # Generating Token
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = refresh_token_for(user)
 
     return {
         "refresh": str(refresh),
@@ -25,7 +36,10 @@ class UserSignup(APIView):
     def post(self, request, format=None):
         serializer = UserSignupSerializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            user = serializer.save()
+            with transaction.atomic():
+                user = serializer.save()
+                outbox.enqueue("core.tasks.send_welcome_emails", [user.pk])
+                outbox.enqueue("core.tasks.create_default_follows", [user.pk])
             token = get_tokens_for_user(user)
             return Response(
                 {"msg": "User Signed Up Successfully!", "token": token},
@@ -78,3 +92,75 @@ class UserLogout(APIView):
             {"msg": "Something went wrong!"},
             status=status.HTTP_400_BAD_REQUEST,
         )
+
+
+class UserDelete(APIView):
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated]
+
+    def delete(self, request, format=None):
+        # The account is deactivated now; its posts, likes, comments and
+        # follows are removed in the background.
+        soft_delete_user(request.user)
+        return Response(
+            {"msg": "User Deleted Successfully!"},
+            status=status.HTTP_200_OK,
+        )
+
+
+class UserOnline(APIView):
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        return Response(
+            {"online": online_count(), "window": settings.ONLINE_WINDOW},
+            status=status.HTTP_200_OK,
+        )
+
+
+class UserProvision(APIView):
+    """
+    Creates users in bulk for onboarding, from a JSON body {"users": [...]}
+    or an uploaded CSV or JSONL file. Each user needs email, first_name,
+    last_name, gender and password; the response is the provisioning report.
+    Passwords are hashed in the request's process, so requests with more than
+    PROVISION_MAX_API_ROWS rows are refused with 413 before anything is
+    written; use the provision_users command for those.
+    """
+
+    parser_classes = [JSONParser, MultiPartParser]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request, format=None):
+        upload = request.FILES.get("file")
+        if upload is not None:
+            fmt = request.data.get("format") or upload.name.rsplit(".", 1)[-1].lower()
+            if fmt not in ("csv", "jsonl"):
+                return Response(
+                    {"errors": {"msg": "Format must be csv or jsonl!"}},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            rows = iter_rows(upload.file, fmt)
+        else:
+            users = request.data.get("users")
+            if not isinstance(users, list):
+                return Response(
+                    {"errors": {"msg": "A users list or a file is required!"}},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            rows = enumerate(users, start=1)
+        limit = settings.PROVISION_MAX_API_ROWS
+        rows = list(islice(rows, limit + 1))
+        if len(rows) > limit:
+            return Response(
+                {
+                    "errors": {
+                        "msg": f"At most {limit} users per request; "
+                        "use the provision_users command for more!"
+                    }
+                },
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        report = provision_users(rows)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
@@ -1,6 +1,102 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from rest_framework.pagination import LimitOffsetPagination
 
 
 class CustomPagination(LimitOffsetPagination):
     # default_limit = 5
     pass
+
+
+class DirectoryPagination(LimitOffsetPagination):
+    default_limit = 50
+    max_limit = 500
+
+
+class CachedCountPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination that caches the total count of each distinct
+    query for ``count_timeout`` seconds, so paging through a large result
+    set runs COUNT(*) once instead of once per page. The count can lag
+    behind new rows by up to the timeout.
+    """
+
+    default_limit = 50
+    max_limit = 500
+    count_timeout = 60
+
+    def get_count(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.md5(
+            f"{sql}{params}".encode(), usedforsecurity=False
+        ).hexdigest()
+        return cache.get_or_set(
+            f"pagination:count:{digest}", queryset.count, self.count_timeout
+        )
+
+
+def estimated_row_count(model, using="default"):
+    """
+    Return the planner's row estimate for ``model``'s table, or None when the
+    database keeps no usable statistics.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(table)],
+            )
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            # sqlite_stat1 only exists once ANALYZE has been run.
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = %s AND idx IS NULL",
+                [table],
+            )
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+        else:
+            return None
+        row = cursor.fetchone()
+    # Postgres reports -1 for tables that were never vacuumed/analyzed.
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that uses the table statistics instead of COUNT(*) for
+    unfiltered changelists of large tables. Small tables, tables without
+    statistics and filtered changelists still get an exact count.
+    """
+
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        object_list = self.object_list
+        query = getattr(object_list, "query", None)
+        # The default manager's own filter (soft delete) doesn't count.
+        if query is not None and query.where == self._unfiltered_where():
+            estimate = estimated_row_count(object_list.model, object_list.db)
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                return estimate
+        return super().count
+
+    def _unfiltered_where(self):
+        return self.object_list.model._default_manager.all().query.where
@@ -1,44 +1,87 @@
 from django.contrib import admin
 
-from .models import Comment, Course, Follow, Like, Post, Student, Teacher
+from .CustomPagination import EstimatedCountPaginator
+from .models import (
+    Comment,
+    Course,
+    Follow,
+    Like,
+    OutboxMessage,
+    Post,
+    Student,
+    Teacher,
+)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables that grow to millions of rows.
+    """
+
+    paginator = EstimatedCountPaginator
+    # Avoid the second COUNT(*) over the whole table on filtered pages.
+    show_full_result_count = False
 
 
 # Register your models here.
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = ["uuid", "user", "title", "content"]
+    list_select_related = ["user"]
+    autocomplete_fields = ["user"]
+    search_fields = ["title"]
 
 
 @admin.register(Like)
-class LikeAdmin(admin.ModelAdmin):
+class LikeAdmin(LargeTableAdmin):
     list_display = ["uuid", "user", "post"]
+    list_select_related = ["user", "post"]
+    autocomplete_fields = ["user", "post"]
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ["uuid", "post", "content"]
+    list_select_related = ["post"]
+    autocomplete_fields = ["user", "post"]
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = ["uuid", "user", "user_following"]
+    list_select_related = ["user", "user_following"]
+    autocomplete_fields = ["user", "user_following"]
 
 
 @admin.register(Teacher)
 class TeacherAdmin(admin.ModelAdmin):
     list_display = ["name"]
+    search_fields = ["name"]
 
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ["name", "teacher"]
+    list_select_related = ["teacher"]
+    autocomplete_fields = ["teacher"]
+    search_fields = ["name"]
 
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
     list_display = ["name", "roll", "email", "display_courses", "address"]
+    autocomplete_fields = ["courses"]
+    search_fields = ["name", "roll", "email"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("courses")
 
     def display_courses(self, obj):
         return ", ".join(course.name for course in obj.courses.all())
 
     display_courses.short_description = "Courses"
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(LargeTableAdmin):
+    list_display = ["uuid", "task_name", "created_at"]
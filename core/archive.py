@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedComment, ArchivedLike, Comment, Like
+
+ARCHIVES = {Like: ArchivedLike, Comment: ArchivedComment}
+
+
+def archive_cutoff():
+    return timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+
+
+def archive_before(model, cutoff, batch_size=1000):
+    """
+    Move ``model`` rows created before ``cutoff`` to their archive table,
+    ``batch_size`` rows per transaction, oldest first. Returns the number of
+    moved rows. Safe to rerun after a crash: rows already copied are skipped.
+    """
+    archive = ARCHIVES[model]
+    columns = [
+        field.attname
+        for field in archive._meta.concrete_fields
+        if field.name != "archived_at"
+    ]
+    pending = model.all_objects.filter(created_at__lt=cutoff).order_by("created_at")
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(pending.values(*columns)[:batch_size])
+            if not rows:
+                return moved
+            archive.objects.bulk_create(
+                [archive(**row) for row in rows], ignore_conflicts=True
+            )
+            model.all_objects.filter(pk__in=[row["uuid"] for row in rows]).delete()
+        moved += len(rows)
+
+
+def archive_old_activity(cutoff=None, batch_size=1000):
+    """
+    Archive likes and comments older than ``cutoff`` (default:
+    ARCHIVE_AFTER_DAYS ago). Returns the moved row counts by table.
+    """
+    cutoff = cutoff or archive_cutoff()
+    return {
+        model._meta.db_table: archive_before(model, cutoff, batch_size)
+        for model in ARCHIVES
+    }
+
+
+def count_with_archive(model, **filters):
+    """
+    Count the hot and archived rows matching ``filters``.
+    """
+    return (
+        model.objects.filter(**filters).count()
+        + ARCHIVES[model].objects.filter(**filters).count()
+    )
+
+
+def time_recent_activity(post_ids, repeat=20):
+    """
+    Average seconds to load the 20 newest likes and comments of each post,
+    the typical hot-table read.
+    """
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for post_id in post_ids:
+            list(Like.objects.filter(post=post_id).order_by("-created_at")[:20])
+            list(Comment.objects.filter(post=post_id).order_by("-created_at")[:20])
+    return (time.perf_counter() - started) / (repeat * max(len(post_ids), 1))
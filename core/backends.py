@@ -0,0 +1,76 @@
+import atexit
+import logging
+import threading
+import time
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def cached_setting(name):
+    """
+    Decorator caching a function of no arguments until the ``name`` setting
+    changes (override_settings in tests), for objects built from a setting
+    once per process.
+    """
+
+    def decorator(func):
+        cached = lru_cache(maxsize=None)(func)
+
+        def reset(*, setting, **kwargs):
+            if setting == name:
+                cached.cache_clear()
+
+        setting_changed.connect(reset, weak=False)
+        return cached
+
+    return decorator
+
+
+def load_backend(config, default):
+    """
+    Instantiate ``config["BACKEND"]`` (a dotted path, ``default`` if
+    missing) with ``config["OPTIONS"]`` as keyword arguments.
+    """
+    backend_class = import_string(config.get("BACKEND", default))
+    return backend_class(**config.get("OPTIONS", {}))
+
+
+class FlushThread:
+    """
+    Daemon thread calling ``flush`` every ``interval`` seconds for the local
+    write-behind buffers, and once more at exit. It is started by the first
+    ``ensure_started`` call, so no thread runs until something is buffered;
+    with no interval it never starts and ``flush`` must be called directly.
+    Errors are logged with ``error`` and the next run tries again.
+    """
+
+    def __init__(self, flush, interval, error):
+        self.flush = flush
+        self.interval = interval
+        self.error = error
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._thread is not None or not self.interval:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(self.error)
+            finally:
+                connection.close()
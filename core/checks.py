@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Cache backends holding data in the process that wrote it.
+LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Idempotency keys and their in-flight locks are kept in the default
+    cache; with a per-process cache, retries reaching another worker are
+    neither replayed nor locked out.
+    """
+    if settings.DEBUG:
+        return []
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend not in LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"The default cache ({backend}) is not shared between processes, "
+            "so Idempotency-Key only deduplicates retries handled by the "
+            "same worker.",
+            hint="Set REDIS_CACHE_URL to use a shared cache.",
+            id="core.W001",
+        )
+    ]
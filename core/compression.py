@@ -0,0 +1,166 @@
+import gzip
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+class GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        # Sync flush so each chunk reaches the client as soon as it is ready.
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def get_encoders(config=None):
+    """
+    Return ``{encoding: (compress(bytes), stream factory)}`` for the
+    COMPRESSION setting's ENCODINGS, in order of preference, leaving out br
+    when the brotli package is not installed.
+    """
+    config = settings.COMPRESSION if config is None else config
+    level = config.get("GZIP_LEVEL", 6)
+    quality = config.get("BROTLI_QUALITY", 5)
+    available = {
+        "gzip": (
+            lambda data: gzip.compress(data, compresslevel=level, mtime=0),
+            lambda: GzipStream(level),
+        )
+    }
+    if brotli is not None:
+        available["br"] = (
+            lambda data: brotli.compress(data, quality=quality),
+            lambda: BrotliStream(quality),
+        )
+    return {
+        name: available[name]
+        for name in config.get("ENCODINGS", ["br", "gzip"])
+        if name in available
+    }
+
+
+def choose_encoding(accept_encoding, encodings):
+    """
+    Pick the encoding from ``encodings`` (in server preference order) with
+    the highest q-value in the Accept-Encoding header, or None.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best = None
+    for name in encodings:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (name, q)
+    return best[0] if best else None
+
+
+def _compress_stream(content, stream):
+    for chunk in content:
+        if chunk:
+            yield stream.compress(chunk)
+    yield stream.finish()
+
+
+async def _compress_async_stream(content, stream):
+    async for chunk in content:
+        if chunk:
+            yield stream.compress(chunk)
+    yield stream.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli (when installed) or gzip, negotiated from
+    Accept-Encoding and configured by the COMPRESSION setting. Responses
+    smaller than MIN_SIZE, of non-text types, or already encoded are sent
+    as they are. Streaming responses are compressed chunk by chunk and
+    flushed after each one, so they still stream.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION.get("MIN_SIZE", 1024)
+        self.encoders = get_encoders()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get("Content-Type", "").lower()
+        if (
+            response.has_header("Content-Encoding")
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+            or (not response.streaming and len(response.content) < self.min_size)
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(
+            request.headers.get("Accept-Encoding", ""), self.encoders
+        )
+        if encoding is None:
+            return response
+        compress, stream = self.encoders[encoding]
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _compress_async_stream(
+                    response.streaming_content, stream()
+                )
+            else:
+                response.streaming_content = _compress_stream(
+                    response.streaming_content, stream()
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The body changed, so a strong ETag must become weak (RFC 9110
+        # 8.8.1); weak comparison still matches it on If-None-Match.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
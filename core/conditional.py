@@ -0,0 +1,177 @@
+import hashlib
+from datetime import datetime
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .models import ArchivedComment, ArchivedLike, Comment, Follow, Like, Post
+
+# Validators are derived from timestamps and row counts only, so a 304 costs
+# one aggregate query and the serializer never runs. Deletes leave no
+# timestamp behind: counts catch them for ETags, and deleting a comment or
+# post bumps Post.updated_at so Last-Modified moves forward too. Likes and
+# comments are read from the hot and archive tables alike, so both feed in.
+
+
+def _aggregate(model, lookup, outer="user", **aggregates):
+    """
+    Correlated subqueries computing ``aggregates`` over the ``model`` rows
+    whose ``lookup`` matches the outer row's ``outer`` field.
+    """
+    queryset = (
+        model.objects.filter(**{lookup: OuterRef(outer)}, post__deleted_at=None)
+        .order_by()
+        .values(lookup)
+    )
+    return {
+        name: Subquery(queryset.annotate(value=aggregate).values("value")[:1])
+        for name, aggregate in aggregates.items()
+    }
+
+
+def post_validators(request, pk):
+    """
+    The post body embeds its author and every comment and like on the
+    author's posts, so all of them feed into the validators.
+    """
+    posts_at = (
+        Post.all_objects.filter(user=OuterRef("user"))
+        .order_by()
+        .values("user")
+        .annotate(at=Max("updated_at"))
+        .values("at")[:1]
+    )
+    return (
+        Post.objects.filter(pk=pk)
+        .annotate(
+            posts_at=Subquery(posts_at),
+            **_aggregate(
+                Comment,
+                "post__user",
+                comments=Count("pk"),
+                comments_at=Max("updated_at"),
+            ),
+            **_aggregate(
+                Like, "post__user", likes=Count("pk"), likes_at=Max("created_at")
+            ),
+            **_aggregate(
+                ArchivedComment,
+                "post__user",
+                archived_comments=Count("pk"),
+                archived_comments_at=Max("updated_at"),
+            ),
+            **_aggregate(
+                ArchivedLike,
+                "post__user",
+                archived_likes=Count("pk"),
+                archived_likes_at=Max("created_at"),
+            ),
+        )
+        .values_list(
+            "updated_at",
+            "posts_at",
+            "user__updated_at",
+            "comments",
+            "comments_at",
+            "likes",
+            "likes_at",
+            "archived_comments",
+            "archived_comments_at",
+            "archived_likes",
+            "archived_likes_at",
+        )
+        .first()
+    )
+
+
+def post_comments_validators(request, pk):
+    return (
+        Post.objects.filter(pk=pk)
+        .annotate(
+            **_aggregate(
+                Comment,
+                "post",
+                outer="pk",
+                comments=Count("pk"),
+                comments_at=Max("updated_at"),
+            ),
+            **_aggregate(
+                Like, "post", outer="pk", likes=Count("pk"), likes_at=Max("created_at")
+            ),
+            **_aggregate(
+                ArchivedComment,
+                "post",
+                outer="pk",
+                archived_comments=Count("pk"),
+                archived_comments_at=Max("updated_at"),
+            ),
+            **_aggregate(
+                ArchivedLike,
+                "post",
+                outer="pk",
+                archived_likes=Count("pk"),
+                archived_likes_at=Max("created_at"),
+            ),
+        )
+        .values_list(
+            "updated_at",
+            "comments",
+            "comments_at",
+            "likes",
+            "likes_at",
+            "archived_comments",
+            "archived_comments_at",
+            "archived_likes",
+            "archived_likes_at",
+        )
+        .first()
+    )
+
+
+def _follow_validators(lookup, related):
+    def validators(request, pk):
+        follows = Follow.objects.filter(**{lookup: pk}).aggregate(
+            count=Count("pk"),
+            at=Max("created_at"),
+            users_at=Max(f"{related}__updated_at"),
+        )
+        return (follows["count"], follows["at"], follows["users_at"])
+
+    return validators
+
+
+followers_validators = _follow_validators("user_following", "user")
+followings_validators = _follow_validators("user", "user_following")
+
+
+def _validators(request, func, kwargs):
+    # Computed once per request and shared by the ETag and Last-Modified
+    # callbacks of ``condition``.
+    if not hasattr(request, "_conditional_validators"):
+        request._conditional_validators = func(request, **kwargs)
+    return request._conditional_validators
+
+
+def conditional(func):
+    """
+    Method decorator adding ETag/Last-Modified headers to a GET handler and
+    answering If-None-Match/If-Modified-Since with 304 before the handler
+    runs. ``func(request, **kwargs)`` returns a tuple of values that changes
+    whenever the response does (None when the object does not exist).
+    """
+
+    def etag(request, *args, **kwargs):
+        values = _validators(request, func, kwargs)
+        if values is None:
+            return None
+        # The query string selects the representation (?fields=, ?expand=).
+        key = repr((values, request.GET.urlencode()))
+        return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        values = _validators(request, func, kwargs)
+        timestamps = [value for value in values or () if isinstance(value, datetime)]
+        return max(timestamps) if timestamps else None
+
+    return method_decorator(condition(etag_func=etag, last_modified_func=last_modified))
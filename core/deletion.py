@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from authentication import summaries
+from authentication.models import User
+
+from . import outbox
+from .models import ArchivedComment, ArchivedLike, Comment, Follow, Like, Post
+
+# Deleting a post or user only flags it; the rows depending on it are then
+# removed by Celery tasks in batches of PURGE_BATCH_SIZE, each batch in its
+# own short transaction, instead of one long cascade in the request.
+
+
+def soft_delete_post(post):
+    with transaction.atomic():
+        now = timezone.now()
+        # updated_at marks the change for the author's other posts'
+        # Last-Modified, whose bodies drop this post's comments and likes.
+        Post.all_objects.filter(pk=post.pk).update(deleted_at=now, updated_at=now)
+        outbox.enqueue("core.tasks.purge_deleted_post", str(post.pk))
+
+
+def soft_delete_user(user):
+    now = timezone.now()
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False, deleted_at=now)
+        Post.objects.filter(user=user.pk).update(deleted_at=now)
+        outbox.enqueue("core.tasks.purge_deleted_user", user.pk)
+    # update() sends no post_save, so drop the cached summary here.
+    summaries.invalidate(User, user)
+
+
+def delete_in_batches(queryset, batch_size=None):
+    """
+    Delete the rows of ``queryset`` ``batch_size`` at a time and return how
+    many were deleted.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            model._base_manager.filter(pk__in=pks).delete()
+        deleted += len(pks)
+
+
+def purge_post(post_id, batch_size=None):
+    """
+    Remove a soft-deleted post together with its likes and comments, hot
+    and archived.
+    """
+    for model in (Like, Comment, ArchivedLike, ArchivedComment):
+        delete_in_batches(model.all_objects.filter(post=post_id), batch_size)
+    Post.all_objects.filter(pk=post_id, deleted_at__isnull=False).delete()
+
+
+def purge_user(user_id, batch_size=None):
+    """
+    Remove a deleted user's follows, likes, comments and posts, then the
+    user row itself.
+    """
+    delete_in_batches(
+        Follow.all_objects.filter(Q(user=user_id) | Q(user_following=user_id)),
+        batch_size,
+    )
+    for model in (Like, Comment, ArchivedLike, ArchivedComment):
+        delete_in_batches(model.all_objects.filter(user=user_id), batch_size)
+    posts = Post.all_objects.filter(user=user_id)
+    posts.filter(deleted_at__isnull=True).update(deleted_at=timezone.now())
+    while post_ids := list(posts.values_list("pk", flat=True)[:100]):
+        for post_id in post_ids:
+            purge_post(post_id, batch_size)
+    User.objects.filter(pk=user_id, deleted_at__isnull=False).delete()
@@ -0,0 +1,86 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.path}\n{body}".encode()).hexdigest()
+
+
+def _replay(stored):
+    return Response(
+        stored["data"],
+        status=stored["status"],
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def idempotent(handler):
+    """
+    Decorator for create handlers honouring the ``Idempotency-Key`` header.
+
+    The first response for a user and key is stored in the cache for
+    IDEMPOTENCY_KEY_TTL seconds and replayed for retries without calling the
+    handler again. A retry arriving while the first request is still running
+    gets 409, and reusing a key with a different body gets 422. Requests
+    without the header are handled as usual.
+    """
+
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return handler(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"errors": {"msg": f"{HEADER} must be at most 255 characters!"}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        cache_key = f"idempotency:{request.user.pk}:{digest}"
+        lock_key = f"{cache_key}:lock"
+        fingerprint = _fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is None:
+            if not cache.add(lock_key, 1, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                return Response(
+                    {"errors": {"msg": "A request with this key is in progress!"}},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            try:
+                # The first request may have finished while we took the lock.
+                stored = cache.get(cache_key)
+                if stored is None:
+                    response = handler(self, request, *args, **kwargs)
+                    if response.status_code < 500:
+                        cache.set(
+                            cache_key,
+                            {
+                                "fingerprint": fingerprint,
+                                "status": response.status_code,
+                                "data": response.data,
+                            },
+                            settings.IDEMPOTENCY_KEY_TTL,
+                        )
+                    return response
+            finally:
+                cache.delete(lock_key)
+
+        if stored["fingerprint"] != fingerprint:
+            return Response(
+                {"errors": {"msg": f"{HEADER} was used for another request!"}},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return _replay(stored)
+
+    return wrapper
@@ -0,0 +1,42 @@
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last = (0, 0)
+
+
+def uuid7(timestamp=None):
+    """
+    Return a time-ordered UUID (RFC 9562 version 7).
+
+    The first 48 bits are the Unix time in milliseconds, so keys generated
+    close together land next to each other in the primary key index instead
+    of at random pages like uuid4. The remaining 74 bits are random. Keys
+    generated in this process without ``timestamp`` are strictly increasing,
+    even within one millisecond, so inserts always append to the last index
+    page. ``timestamp`` (seconds) backdates the key, e.g. for existing rows.
+    """
+    global _last
+    rand = int.from_bytes(os.urandom(10), "big") & ((1 << 74) - 1)
+    if timestamp is not None:
+        return _build(int(timestamp * 1000), rand)
+    millis = time.time_ns() // 1_000_000
+    with _lock:
+        last_millis, last_rand = _last
+        if millis <= last_millis:
+            # Same millisecond (or the clock went back): step past the last
+            # key by a random amount that still leaves room for more.
+            millis, rand = last_millis, last_rand + 1 + (rand >> 50)
+            if rand >> 74:
+                millis, rand = millis + 1, rand & ((1 << 74) - 1)
+        _last = (millis, rand)
+    return _build(millis, rand)
+
+
+def _build(millis, rand):
+    # 48 bits of time, version 7, 12 random bits, RFC 4122 variant (0b10),
+    # 62 random bits.
+    value = (millis & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | (rand >> 62) << 64
+    return uuid.UUID(int=value | 0x2 << 62 | rand & ((1 << 62) - 1))
@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .models import Course, Student
+
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportReport:
+    """
+    Counters for one import run. Only the first MAX_REPORTED_ERRORS errors
+    are kept so the report stays small for bad files.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.students = 0
+        self.enrollments = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def error(self, line, msg):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "msg": msg})
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        elapsed = self.elapsed
+        return {
+            "rows": self.rows,
+            "students": self.students,
+            "enrollments": self.enrollments,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed) if elapsed else 0,
+        }
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield ``(line, row)`` pairs from a binary CSV or JSONL stream without
+    reading it into memory. CSV files need a header row.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for line, raw in enumerate(text, start=1):
+            if raw.strip():
+                try:
+                    yield line, json.loads(raw)
+                except ValueError:
+                    yield line, None
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def chunked(iterable, size):
+    """
+    Yield lists of up to ``size`` items from ``iterable``.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _split_courses(value):
+    """
+    Courses are given as a list (JSONL) or a ``;`` separated string (CSV) of
+    course ids or names.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(";")
+    return [str(course).strip() for course in value if str(course).strip()]
+
+
+def _release_order(takes, students):
+    """
+    ``takes`` maps rolls taking an email to the roll in the chunk holding it
+    now. Return each taking roll's depth: how many rows must be written
+    before it so the email is free. Rolls in a cycle (emails swapped) or
+    waiting on a roll that isn't written get None.
+    """
+    depths = {}
+    for roll in takes:
+        path = []
+        current = roll
+        while current in takes and current not in depths and current not in path:
+            path.append(current)
+            current = takes[current]
+        if current in depths:
+            depth = depths[current]
+        elif current in path or current not in students:
+            depth = None
+        else:
+            depth = 0
+        for node in reversed(path):
+            depth = None if depth is None else depth + 1
+            depths[node] = depth
+    return depths
+
+
+def import_students(rows, chunk_size=1000):
+    """
+    Upsert students and their enrollments from ``(line, row)`` pairs.
+
+    Rows are keyed by ``roll``: existing students get their name, address and
+    email updated and new enrollments added. A row whose email belongs to a
+    student with another roll is skipped, unless that student's row in the
+    same chunk moves it to another email; swapped emails are skipped too.
+    Each chunk is validated and written with two bulk inserts in its own
+    transaction.
+    """
+    report = ImportReport()
+    course_ids = {}
+    for course_id, name in Course.objects.values_list("id", "name"):
+        course_ids[str(course_id)] = course_id
+        course_ids.setdefault(name, course_id)
+
+    for chunk in chunked(rows, chunk_size):
+        report.rows += len(chunk)
+        students = {}
+        enrollments = {}
+        emails = {}
+        lines = {}
+        for line, row in chunk:
+            if not isinstance(row, dict):
+                report.error(line, "Malformed row")
+                continue
+            roll = str(row.get("roll") or "").strip()
+            name = str(row.get("name") or "").strip()
+            email = str(row.get("email") or "").strip()
+            if not roll or not name or not email:
+                report.error(line, "roll, name and email are required")
+                continue
+            try:
+                validate_email(email)
+            except ValidationError:
+                report.error(line, f"Invalid email {email!r}")
+                continue
+            courses = _split_courses(row.get("courses"))
+            unknown = [course for course in courses if course not in course_ids]
+            if unknown:
+                report.error(line, f"Unknown courses {unknown}")
+                continue
+            if emails.setdefault(email, roll) != roll:
+                report.error(line, f"Email {email!r} repeated for another roll")
+                continue
+            lines[roll] = line
+            students[roll] = Student(
+                roll=roll,
+                name=name,
+                email=email,
+                address=str(row.get("address") or ""),
+            )
+            enrollments.setdefault(roll, set()).update(
+                course_ids[course] for course in courses
+            )
+
+        emails = {student.email: roll for roll, student in students.items()}
+        holders = Student.objects.filter(email__in=emails).values_list("email", "roll")
+        takes = {}
+        for email, holder in holders:
+            roll = emails[email]
+            if holder == roll:
+                continue
+            if holder in students:
+                takes[roll] = holder
+            else:
+                report.error(
+                    lines[roll], f"Email {email!r} already belongs to roll {holder!r}"
+                )
+                del students[roll]
+        depths = _release_order(takes, students)
+        for roll, depth in depths.items():
+            if depth is None:
+                report.error(
+                    lines[roll],
+                    f"Email {students[roll].email!r} is still held by roll "
+                    f"{takes[roll]!r}, which doesn't release it in this chunk "
+                    "(swapped emails)",
+                )
+                del students[roll]
+        if not students:
+            continue
+        # Emails are unique, so a row may only take an email after the row
+        # of its current holder has moved it elsewhere.
+        students = dict(
+            sorted(students.items(), key=lambda item: depths.get(item[0], 0))
+        )
+
+        with transaction.atomic():
+            Student.objects.bulk_create(
+                students.values(),
+                update_conflicts=True,
+                unique_fields=["roll"],
+                update_fields=["name", "email", "address"],
+            )
+            student_ids = dict(
+                Student.objects.filter(roll__in=students).values_list("roll", "id")
+            )
+            Through = Student.courses.through
+            links = [
+                Through(student_id=student_ids[roll], course_id=course_id)
+                for roll, courses in enrollments.items()
+                if roll in students
+                for course_id in courses
+            ]
+            Through.objects.bulk_create(links, ignore_conflicts=True)
+        report.students += len(students)
+        report.enrollments += len(links)
+
+    return report
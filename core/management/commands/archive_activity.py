@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.archive import ARCHIVES, archive_old_activity, time_recent_activity
+from core.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Move likes and comments older than the cutoff to the archive tables "
+        "and report hot-table size and recent-activity latency before/after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Archive rows older than this many days "
+            "(default: ARCHIVE_AFTER_DAYS).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--sample-posts",
+            type=int,
+            default=50,
+            help="Recent posts used to time the recent-activity query.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = None
+        if options["days"] is not None:
+            cutoff = timezone.now() - timedelta(days=options["days"])
+        posts = list(
+            Post.objects.order_by("-created_at").values_list("pk", flat=True)[
+                : options["sample_posts"]
+            ]
+        )
+
+        before = self._measure(posts)
+        moved = archive_old_activity(cutoff, options["batch_size"])
+        after = self._measure(posts)
+
+        for table, count in moved.items():
+            self.stdout.write(f"{table}: archived {count} rows")
+        for label, stats in (("before", before), ("after", after)):
+            sizes = ", ".join(
+                f"{table}={rows}" for table, rows in stats["rows"].items()
+            )
+            self.stdout.write(
+                f"{label}: {sizes}; recent activity "
+                f"{stats['latency'] * 1000:.3f}ms per post"
+            )
+
+    def _measure(self, posts):
+        return {
+            "rows": {
+                model._meta.db_table: model.all_objects.count() for model in ARCHIVES
+            },
+            "latency": time_recent_activity(posts),
+        }
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from core.compression import get_encoders
+
+PATHS = [
+    "/api/post/list/",
+    "/api/comments/user/{user}/",
+    "/api/followers/user/{user}/",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch the list endpoints uncompressed and report, per encoding and "
+        "level, the bytes saved and the CPU time to compress one response."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="Defaults to the list endpoints.")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument(
+            "--gzip-levels", type=int, nargs="+", default=[1, 6, 9], metavar="LEVEL"
+        )
+        parser.add_argument(
+            "--brotli-qualities",
+            type=int,
+            nargs="+",
+            default=[1, 5, 11],
+            metavar="QUALITY",
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_active=True).first()
+        if user is None:
+            raise CommandError("Needs at least one active user.")
+        # With DEBUG an empty ALLOWED_HOSTS allows localhost, not "testserver".
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(user=user)
+
+        configs = [("gzip", {"GZIP_LEVEL": level}) for level in options["gzip_levels"]]
+        configs += [
+            ("br", {"BROTLI_QUALITY": quality})
+            for quality in options["brotli_qualities"]
+        ]
+        for path in options["paths"] or PATHS:
+            path = path.format(user=user.pk)
+            response = client.get(path, HTTP_ACCEPT_ENCODING="identity")
+            body = response.content
+            self.stdout.write(
+                self.style.SUCCESS(f"{path}: {response.status_code}, {len(body)} bytes")
+            )
+            for name, config in configs:
+                encoders = get_encoders(dict(config, ENCODINGS=[name]))
+                if name not in encoders:
+                    self.stdout.write(f"  {name}: not installed")
+                    continue
+                compress, _ = encoders[name]
+                started = time.process_time()
+                for _ in range(options["iterations"]):
+                    compressed = compress(body)
+                cpu = (time.process_time() - started) / options["iterations"]
+                saved = 1 - len(compressed) / len(body) if body else 0
+                level = next(iter(config.values()))
+                self.stdout.write(
+                    f"  {name:>4} {level:>2}: {len(compressed):>8} bytes "
+                    f"({saved:.0%} saved), {cpu * 1e6:,.0f}us CPU per response"
+                )
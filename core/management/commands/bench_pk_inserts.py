@@ -0,0 +1,81 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import UUIDField
+
+from core.ids import uuid7
+
+GENERATORS = {"uuid4": lambda: uuid.uuid4(), "uuid7": lambda: uuid7()}
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert --rows keys into scratch tables keyed by uuid4 and uuid7 and "
+        "compare throughput and primary key index size. Random keys split "
+        "index pages half-full, so the extra pages are the page splits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        column = UUIDField().db_type(connection)
+        for name, generate in GENERATORS.items():
+            table = f"bench_pk_{name}"
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                cursor.execute(
+                    f"CREATE TABLE {table} (id {column} PRIMARY KEY, n integer)"
+                )
+                try:
+                    elapsed = self._insert(cursor, table, generate, options)
+                    pages = self._index_pages(cursor, table)
+                finally:
+                    cursor.execute(f"DROP TABLE {table}")
+            self.stdout.write(
+                f"{name}: {options['rows']} rows in {elapsed:.1f}s "
+                f"({options['rows'] / elapsed:,.0f} rows/s), "
+                f"index pages: {pages if pages is not None else 'n/a'}"
+            )
+
+    def _insert(self, cursor, table, generate, options):
+        rows, batch_size = options["rows"], options["batch_size"]
+        sql = f"INSERT INTO {table} (id, n) VALUES (%s, %s)"
+        # Store keys the way the ORM would for this backend.
+        prep = UUIDField().get_db_prep_value
+        started = time.perf_counter()
+        for start in range(0, rows, batch_size):
+            batch = [
+                (prep(generate(), connection), n)
+                for n in range(start, min(start + batch_size, rows))
+            ]
+            # One commit per batch, as bulk_create would.
+            with transaction.atomic():
+                cursor.executemany(sql, batch)
+        return time.perf_counter() - started
+
+    def _index_pages(self, cursor, table):
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT pg_relation_size(%s) / current_setting('block_size')::int",
+                [f"{table}_pkey"],
+            )
+            return cursor.fetchone()[0]
+        if connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s",
+                [table],
+            )
+            index = cursor.fetchone()
+            try:
+                cursor.execute(
+                    "SELECT count(*) FROM dbstat WHERE name = %s", [index[0]]
+                )
+            except Exception:
+                # dbstat is a compile-time option of SQLite.
+                return None
+            return cursor.fetchone()[0]
+        return None
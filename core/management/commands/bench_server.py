@@ -0,0 +1,99 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "uvicorn": "uvicorn_worker.UvicornWorker",
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url):
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=30) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn with gunicorn.conf.py once per worker class and load "
+        "the post list endpoint, reporting throughput and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "classes", nargs="*", help=f"Any of {', '.join(WORKER_CLASSES)}."
+        )
+        parser.add_argument("--path", default="/api/post/list/?limit=20")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--workers", type=int, help="Defaults to the config.")
+
+    def handle(self, *args, **options):
+        unknown = set(options["classes"]) - set(WORKER_CLASSES)
+        if unknown:
+            raise CommandError(f"Unknown worker classes: {', '.join(sorted(unknown))}")
+        for name in options["classes"] or WORKER_CLASSES:
+            self._bench(name, options)
+
+    def _bench(self, name, options):
+        port = _free_port()
+        env = dict(
+            os.environ,
+            GUNICORN_WORKER_CLASS=WORKER_CLASSES[name],
+            GUNICORN_BIND=f"127.0.0.1:{port}",
+        )
+        if options["workers"]:
+            env["GUNICORN_WORKERS"] = str(options["workers"])
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "--log-level", "warning"],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        url = f"http://127.0.0.1:{port}{options['path']}"
+        try:
+            self._wait(url, server)
+            with ThreadPoolExecutor(options["concurrency"]) as pool:
+                started = time.perf_counter()
+                latencies = sorted(pool.map(_get, [url] * options["requests"]))
+                elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{name}: {len(latencies) / elapsed:,.0f} req/s, "
+                f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                f"p99 {p99 * 1000:.1f} ms"
+            )
+        )
+
+    def _wait(self, url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited during startup")
+            try:
+                _get(url)
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"gunicorn did not answer {url} in {timeout}s")
@@ -0,0 +1,77 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What each target imports, run in a fresh interpreter.
+TARGETS = {
+    "wsgi": "import SocialApp.wsgi",
+    "setup": "import django; django.setup()",
+    "celery": "import django; django.setup(); import SocialApp.celery",
+}
+
+
+def parse_importtime(stderr):
+    """
+    Return ``{top-level package: microseconds}`` from ``-X importtime``
+    output. Each module's own (self) time is charged to its top-level
+    package, so the totals add up to the whole import time however deep the
+    module was imported from.
+    """
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, _, name = line[len("import time:") :].split("|")
+        totals[name.strip().split(".")[0]] += int(own)
+    return totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold start of the WSGI entrypoint, django.setup() and the "
+        "Celery app in fresh interpreters, with the -X importtime breakdown "
+        "by top-level package."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("targets", nargs="*", help=f"Any of {', '.join(TARGETS)}.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--top", type=int, default=10)
+
+    def handle(self, *args, **options):
+        unknown = set(options["targets"]) - set(TARGETS)
+        if unknown:
+            raise CommandError(f"Unknown targets: {', '.join(sorted(unknown))}")
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="SocialApp.settings")
+        for target in options["targets"] or TARGETS:
+            command = [sys.executable, "-X", "importtime", "-c", TARGETS[target]]
+            walls = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                result = subprocess.run(
+                    command,
+                    cwd=settings.BASE_DIR,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                walls.append(time.perf_counter() - started)
+            # The breakdown of the last run; earlier runs warmed the disk cache.
+            totals = parse_importtime(result.stderr)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{target}: median {statistics.median(walls) * 1000:.0f} ms "
+                    f"over {len(walls)} runs, imports "
+                    f"{sum(totals.values()) / 1000:.0f} ms"
+                )
+            )
+            ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+            for name, micros in ranked[: options["top"]]:
+                self.stdout.write(f"  {micros / 1000:8.1f} ms  {name}")
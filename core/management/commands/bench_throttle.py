@@ -0,0 +1,61 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import resolve
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.throttling import TokenBucketThrottle
+
+
+class Command(BaseCommand):
+    help = "Measure the cost of one TokenBucketThrottle check."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=100000)
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument(
+            "--backend",
+            default="core.throttling.LocalTokenBucketBackend",
+            help="Dotted path of the backend class to benchmark.",
+        )
+        parser.add_argument(
+            "--redis-url",
+            help="Passed as OPTIONS url, for the Redis backend.",
+        )
+
+    def handle(self, *args, **options):
+        path = "/api/comment/create/"
+        match = resolve(path)
+        factory = APIRequestFactory()
+        requests = []
+        for i in range(options["clients"]):
+            http_request = factory.post(path, REMOTE_ADDR=f"10.0.{i // 256}.{i % 256}")
+            http_request.resolver_match = match
+            request = Request(http_request)
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        config = {
+            "BACKEND": options["backend"],
+            "OPTIONS": {"url": options["redis_url"]} if options["redis_url"] else {},
+            # Never run out of tokens: the point is to time the check itself.
+            "RATES": {match.url_name: "1000000000/s"},
+        }
+        throttle = TokenBucketThrottle()
+        iterations = options["iterations"]
+        with override_settings(TOKEN_BUCKET_THROTTLE=config):
+            throttle.allow_request(requests[0], None)  # build the backend
+            started = time.perf_counter()
+            for i in range(iterations):
+                throttle.allow_request(requests[i % len(requests)], None)
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['backend']}: {iterations} checks in {elapsed:.3f}s, "
+                f"{elapsed / iterations * 1e6:.1f}us per check"
+            )
+        )
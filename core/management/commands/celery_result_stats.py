@@ -0,0 +1,69 @@
+import json
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from SocialApp.celery import app
+
+
+class Command(BaseCommand):
+    help = "Report result backend memory usage grouped by task name."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scan-count",
+            type=int,
+            default=1000,
+            help="Number of keys fetched per SCAN/pipeline round trip.",
+        )
+
+    def handle(self, *args, **options):
+        backend = app.backend
+        client = getattr(backend, "client", None)
+        if client is None or not hasattr(client, "memory_usage"):
+            raise CommandError("celery_result_stats requires the Redis result backend")
+
+        stats = defaultdict(lambda: {"keys": 0, "bytes": 0, "no_ttl": 0})
+        prefix = backend.task_keyprefix
+        if isinstance(prefix, bytes):
+            prefix = prefix.decode()
+
+        batch = []
+        for key in client.scan_iter(match=f"{prefix}*", count=options["scan_count"]):
+            batch.append(key)
+            if len(batch) >= options["scan_count"]:
+                self._collect(client, batch, stats)
+                batch = []
+        if batch:
+            self._collect(client, batch, stats)
+
+        rows = sorted(stats.items(), key=lambda item: item[1]["bytes"], reverse=True)
+        self.stdout.write(f"{'task':<50} {'keys':>8} {'bytes':>12} {'no ttl':>8}")
+        for name, row in rows:
+            self.stdout.write(
+                f"{name:<50} {row['keys']:>8} {row['bytes']:>12} {row['no_ttl']:>8}"
+            )
+        total = sum(row["bytes"] for row in stats.values())
+        self.stdout.write(self.style.SUCCESS(f"Total: {total} bytes"))
+
+    def _collect(self, client, keys, stats):
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.memory_usage(key)
+            pipe.ttl(key)
+        replies = pipe.execute()
+        for i in range(0, len(replies), 3):
+            value, size, ttl = replies[i : i + 3]
+            if value is None:
+                # Expired between SCAN and GET.
+                continue
+            try:
+                name = json.loads(value).get("name") or "<unknown>"
+            except ValueError:
+                name = "<undecodable>"
+            row = stats[name]
+            row["keys"] += 1
+            row["bytes"] += size or 0
+            if ttl == -1:
+                row["no_ttl"] += 1
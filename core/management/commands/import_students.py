@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importers import import_students, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Upsert students and enrollments from a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Defaults to the file extension.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        if fmt not in ("csv", "jsonl"):
+            raise CommandError("Pass --format csv or --format jsonl")
+
+        with path.open("rb") as stream:
+            report = import_students(
+                iter_rows(stream, fmt), chunk_size=options["chunk_size"]
+            ).as_dict()
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['msg']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report['rows']} rows, {report['students']} students, "
+                f"{report['enrollments']} enrollments, {report['skipped']} skipped "
+                f"in {report['seconds']}s ({report['rows_per_second']} rows/s)"
+            )
+        )
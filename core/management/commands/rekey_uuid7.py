@@ -0,0 +1,110 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Q, UUIDField, Value, When
+
+from core.ids import uuid7
+from core.models import (
+    ArchivedComment,
+    ArchivedLike,
+    Comment,
+    Follow,
+    Like,
+    OutboxMessage,
+    Post,
+)
+
+# Tables whose uuid4 keys are rewritten, with the (model, field) pairs
+# referencing them and the outbox tasks whose first argument is one of their
+# keys.
+REKEY = [
+    (
+        Post,
+        [
+            (Like, "post"),
+            (Comment, "post"),
+            (ArchivedLike, "post"),
+            (ArchivedComment, "post"),
+        ],
+        ["core.tasks.purge_deleted_post"],
+    ),
+    (Like, [], []),
+    (Comment, [], ["core.tasks.send_comment_creation_email"]),
+    (Follow, [], []),
+]
+
+
+def _remap(field, mapping):
+    return Case(
+        *[When(**{field: old}, then=Value(new)) for old, new in mapping.items()],
+        output_field=UUIDField(),
+    )
+
+
+def _remap_outbox(tasks, mapping):
+    """
+    Point pending outbox messages for ``tasks`` at the rewritten keys.
+    """
+    if not tasks:
+        return
+    keys = {str(old): str(new) for old, new in mapping.items()}
+    messages = list(
+        OutboxMessage.objects.filter(task_name__in=tasks, args__0__in=list(keys))
+    )
+    for message in messages:
+        message.args[0] = keys[message.args[0]]
+    OutboxMessage.objects.bulk_update(messages, ["args"])
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite existing uuid4 primary keys as uuid7 derived from created_at, "
+        "so old rows are laid out in time order too. Foreign keys pointing "
+        "at a rewritten post, and pending outbox tasks naming a rewritten "
+        "key, are updated in the same transaction. Safe to rerun; rows that "
+        "already have a uuid7 key are skipped. Run it with the application "
+        "stopped: clients holding old ids will get 404s."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model, references, tasks in REKEY:
+            count = self._rekey(model, references, tasks, options["batch_size"])
+            self.stdout.write(f"{model._meta.db_table}: rekeyed {count} rows")
+
+    def _rekey(self, model, references, tasks, batch_size):
+        manager = model._base_manager
+        pk = model._meta.pk.name
+        rows = manager.order_by("created_at", pk).values_list(pk, "created_at")
+        rekeyed = 0
+        batch = list(rows[:batch_size])
+        while batch:
+            mapping = {
+                key: uuid7(created_at.timestamp())
+                for key, created_at in batch
+                if key.version != 7
+            }
+            if mapping:
+                # Foreign keys are deferred, so children can point at the new
+                # keys before the parent rows are rewritten.
+                with transaction.atomic():
+                    for child, field in references:
+                        child._base_manager.filter(**{f"{field}__in": mapping}).update(
+                            **{field: _remap(field, mapping)}
+                        )
+                    _remap_outbox(tasks, mapping)
+                    manager.filter(pk__in=mapping).update(**{pk: _remap(pk, mapping)})
+                rekeyed += len(mapping)
+            # Keyset on (created_at, pk), so rows sharing a timestamp (all of
+            # them after migration 0005) still come in batch_size pieces.
+            # Rewritten rows may sort after the cursor again; they are
+            # skipped as uuid7.
+            last_key, last = batch[-1]
+            batch = list(
+                rows.filter(
+                    Q(created_at__gt=last)
+                    | Q(created_at=last, **{f"{pk}__gt": last_key})
+                )[:batch_size]
+            )
+        return rekeyed
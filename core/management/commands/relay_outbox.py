@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = "Publish pending outbox messages to the Celery broker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the outbox once and exit instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        published = outbox.relay(
+            batch_size=options["batch_size"],
+            interval=options["interval"],
+            once=options["once"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Published {published} messages"))
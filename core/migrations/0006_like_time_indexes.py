@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 09:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_activity_timestamps"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["post", "-created_at"], name="like_post_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["user", "-created_at"], name="like_user_created_idx"
+            ),
+        ),
+    ]
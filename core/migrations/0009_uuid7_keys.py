@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+import core.ids
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_activity_archive"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comment",
+            name="uuid",
+            field=models.UUIDField(
+                default=core.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="follow",
+            name="uuid",
+            field=models.UUIDField(
+                default=core.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="like",
+            name="uuid",
+            field=models.UUIDField(
+                default=core.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="outboxmessage",
+            name="uuid",
+            field=models.UUIDField(
+                default=core.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="post",
+            name="uuid",
+            field=models.UUIDField(
+                default=core.ids.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
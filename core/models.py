@@ -1,17 +1,58 @@
-import uuid
-
 from django.db import models
 
 # from django.contrib.auth.models import User
 from authentication.models import User
 
+from .ids import uuid7
+
+
+class LiveManager(models.Manager):
+    """
+    Default manager hiding soft-deleted rows until the purge task removes
+    them. Use ``all_objects`` to see them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class LiveUserManager(models.Manager):
+    """
+    Default manager hiding the rows of soft-deleted users, through each of
+    the ``user_fields`` foreign keys, until the purge task removes them. Use
+    ``all_objects`` to see them.
+    """
+
+    def __init__(self, *user_fields):
+        super().__init__()
+        self.user_fields = user_fields or ("user",)
+
+    def get_queryset(self):
+        live = {f"{field}__deleted_at__isnull": True for field in self.user_fields}
+        return super().get_queryset().filter(**live)
+
 
 class Post(models.Model):
-    uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uuid = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=30)
     content = models.CharField(max_length=500)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = LiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Only the few posts waiting for the purge task are indexed.
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_at__isnull=False),
+                name="post_deleted_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -20,45 +61,104 @@ class Post(models.Model):
 class BaseLikeComment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    objects = LiveUserManager()
+    all_objects = models.Manager()
+
     class Meta:
         abstract = True
 
 
 class Like(BaseLikeComment):
-    uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uuid = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
         unique_together = (
             "user",
             "post",
         )
+        # Back the post/user + time range filters of LikeListAPIView.
+        indexes = [
+            models.Index(fields=["post", "-created_at"], name="like_post_created_idx"),
+            models.Index(fields=["user", "-created_at"], name="like_user_created_idx"),
+        ]
 
     def __str__(self):
         return str(self.user)
 
 
 class Comment(BaseLikeComment):
-    uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uuid = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     content = models.TextField(default="No content provided")
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return str(self.user)
 
 
+class BaseArchive(models.Model):
+    """
+    Cold copy of a like or comment moved out of the hot table by
+    core.archive. Foreign keys have no database constraint so moving rows
+    doesn't pay for FK checks; purging a post or user deletes its archived
+    rows explicitly.
+    """
+
+    uuid = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = LiveUserManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        abstract = True
+
+
+class ArchivedLike(BaseArchive):
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "user"], name="archivedlike_post_user_idx"),
+            models.Index(fields=["user", "-created_at"], name="archivedlike_user_idx"),
+        ]
+
+
+class ArchivedComment(BaseArchive):
+    content = models.TextField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post"], name="archivedcomment_post_idx"),
+            models.Index(fields=["user"], name="archivedcomment_user_idx"),
+        ]
+
+
 # class Follow(models.Model):
 #     uuid = models.UUIDField(auto_created=True, primary_key=True)
 #     follower = models.ManyToManyField(User, on_delete=models.CASCADE)
 
 
 class Follow(models.Model):
-    uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uuid = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="user")
     user_following = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="user_following"
     )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = LiveUserManager("user", "user_following")
+    all_objects = models.Manager()
 
     class Meta:
         unique_together = (
@@ -96,3 +196,21 @@ class Student(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task waiting to be published by the outbox relay. Rows are
+    written in the same transaction as the change that triggers the task, so
+    a task is never sent for a rolled back change and never runs before the
+    change is visible.
+    """
+
+    uuid = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    task_name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.task_name
@@ -0,0 +1,80 @@
+import logging
+import time
+
+from django.db import transaction
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task_name, *args, **kwargs):
+    """
+    Record a task to be published by the relay. Call this inside the
+    transaction that writes the data the task depends on.
+    """
+    return OutboxMessage.objects.create(
+        task_name=task_name, args=list(args), kwargs=kwargs
+    )
+
+
+def relay_batch(batch_size=100):
+    """
+    Publish up to ``batch_size`` pending messages and delete them.
+
+    Returns the number of published messages. Stops at the first broker
+    error, leaving the rest of the batch for the next run. The outbox uuid is
+    used as the task id, so a message published twice (crash between send
+    and delete) can be recognised by the consumer. With task_always_eager
+    (CELERY_PROFILE=local) the tasks run here instead, since send_task
+    ignores that setting.
+    """
+    from SocialApp.celery import app
+
+    if app.conf.task_always_eager:
+        # Registers the autodiscovered tasks, as a worker does on start.
+        app.loader.import_default_modules()
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True).order_by(
+                "created_at"
+            )[:batch_size]
+        )
+        published = []
+        for message in batch:
+            try:
+                if app.conf.task_always_eager:
+                    app.tasks[message.task_name].apply(
+                        args=message.args,
+                        kwargs=message.kwargs,
+                        task_id=str(message.uuid),
+                    )
+                else:
+                    app.send_task(
+                        message.task_name,
+                        args=message.args,
+                        kwargs=message.kwargs,
+                        task_id=str(message.uuid),
+                    )
+            except Exception:
+                logger.exception("Failed to publish outbox message %s", message.pk)
+                break
+            published.append(message.pk)
+        OutboxMessage.objects.filter(pk__in=published).delete()
+    return len(published)
+
+
+def relay(batch_size=100, interval=1.0, once=False):
+    """
+    Drain the outbox in batches. Sleeps ``interval`` seconds whenever the
+    outbox is empty or the broker is unavailable. Returns the total number
+    of published messages when ``once`` is set.
+    """
+    total = 0
+    while True:
+        published = relay_batch(batch_size)
+        total += published
+        if published < batch_size:
+            if once:
+                return total
+            time.sleep(interval)
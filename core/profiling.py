@@ -0,0 +1,144 @@
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+
+class Sampler:
+    """
+    One background thread per process that, every ``interval`` seconds,
+    records the stack of each thread registered with ``start``. Stacks are
+    collapsed (``module:function;...`` from the outermost frame) and cut at
+    ``root``, the code object the profiled request entered through, so server
+    frames above it are left out. The thread sleeps while nothing is
+    registered, and is started on the first ``start`` in each process, so a
+    sampler created before a fork (gunicorn's preload_app) still runs in the
+    workers.
+    """
+
+    def __init__(self, interval, root):
+        self.interval = interval
+        self.root = root
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def start(self, thread_id):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, daemon=True).start()
+            self._active[thread_id] = Counter()
+            self._wake.set()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[self._collapse(frame)] += 1
+                if not self._active:
+                    self._wake.clear()
+
+    def _collapse(self, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+            if code is self.root:
+                break
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+_samplers = {}
+_samplers_lock = threading.Lock()
+
+
+def get_sampler(interval):
+    """
+    Return the process's sampler thread for ``interval``, starting it once.
+    """
+    with _samplers_lock:
+        if interval not in _samplers:
+            root = SamplingProfilerMiddleware.__call__.__code__
+            _samplers[interval] = Sampler(interval, root)
+        return _samplers[interval]
+
+
+class SamplingProfilerMiddleware:
+    """
+    Opt-in statistical profiler, configured by the PROFILING setting.
+
+    A request is profiled when it carries the HEADER with the configured
+    TOKEN, or, when SLOW_THRESHOLD is set, every request is sampled and the
+    profile is kept only if the request took longer than that. Kept
+    profiles are appended as collapsed stacks (``stack count`` lines, the
+    input of flamegraph.pl and speedscope) to ``<OUTPUT_DIR>/<url
+    name>.collapsed``. With ENABLED off the middleware removes itself at
+    startup and costs nothing.
+    """
+
+    def __init__(self, get_response):
+        config = getattr(settings, "PROFILING", {})
+        if not config.get("ENABLED"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = config.get("HEADER", "X-Profile")
+        self.token = config.get("TOKEN") or ""
+        self.threshold = config.get("SLOW_THRESHOLD")
+        self.output_dir = Path(config.get("OUTPUT_DIR", "profiles"))
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.sampler = get_sampler(config.get("INTERVAL", 0.005))
+        self._write_lock = threading.Lock()
+
+    def _requested(self, request):
+        value = request.headers.get(self.header)
+        if not value or not self.token:
+            return False
+        return hmac.compare_digest(value.encode(), self.token.encode())
+
+    def __call__(self, request):
+        requested = self._requested(request)
+        if not requested and self.threshold is None:
+            return self.get_response(request)
+
+        thread_id = threading.get_ident()
+        self.sampler.start(thread_id)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = self.sampler.stop(thread_id)
+        elapsed = time.perf_counter() - started
+
+        if requested or elapsed > self.threshold:
+            match = request.resolver_match
+            url_name = (match.url_name if match else None) or "unresolved"
+            self._dump(url_name, stacks)
+            if requested:
+                response["X-Profile-Samples"] = str(sum(stacks.values()))
+        return response
+
+    def _dump(self, url_name, stacks):
+        if not stacks:
+            return
+        lines = "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+        with self._write_lock:
+            with open(self.output_dir / f"{url_name}.collapsed", "a") as out:
+                out.write(lines)
@@ -0,0 +1,194 @@
+import hashlib
+import logging
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = str(Path(settings.BASE_DIR))
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def fingerprint(sql):
+    """
+    Return ``(id, normalized sql)``. Literals and parameters become ``?``
+    and ``IN`` lists collapse to ``(...)``, so the same query with other
+    values or list lengths gets the same id.
+    """
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    sql = sql.strip()
+    return hashlib.sha1(sql.encode()).hexdigest()[:12], sql
+
+
+def call_site():
+    """
+    Return ``path:line in function`` of the innermost project frame outside
+    this module, i.e. the view, serializer or task that ran the query.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(BASE_DIR)
+            and filename != __file__
+            and "site-packages" not in filename
+        ):
+            path = filename[len(BASE_DIR) + 1 :]
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class QueryLog:
+    """
+    Aggregates of slow queries per fingerprint: count, total and max time,
+    the call sites and, when enabled, the plan captured the first time the
+    fingerprint was seen. At most ``max_fingerprints`` are kept.
+    """
+
+    def __init__(self, max_fingerprints=1000):
+        self.max_fingerprints = max_fingerprints
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, sql, elapsed, site):
+        """
+        Record one execution. Returns True the first time ``key`` is seen.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            new = entry is None
+            if new:
+                if len(self._entries) >= self.max_fingerprints:
+                    return False
+                entry = self._entries[key] = {
+                    "fingerprint": key,
+                    "sql": sql,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "call_sites": {},
+                    "explain": None,
+                }
+            ms = elapsed * 1000
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["call_sites"][site] = entry["call_sites"].get(site, 0) + 1
+        return new
+
+    def set_explain(self, key, plan):
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]["explain"] = plan
+
+    def export(self):
+        """
+        Return the aggregates, slowest total first, as JSON-ready dicts.
+        """
+        with self._lock:
+            entries = [
+                dict(entry, call_sites=dict(entry["call_sites"]))
+                for entry in self._entries.values()
+            ]
+        for entry in entries:
+            entry["total_ms"] = round(entry["total_ms"], 3)
+            entry["max_ms"] = round(entry["max_ms"], 3)
+            entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 3)
+        return sorted(entries, key=lambda entry: entry["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+query_log = QueryLog()
+
+
+class SlowQueryWrapper:
+    """
+    ``connection.execute_wrapper`` callable logging queries slower than
+    ``threshold`` seconds with their fingerprint and call site, aggregating
+    them in ``log`` and, with ``explain``, storing the plan of each new
+    fingerprint.
+    """
+
+    def __init__(self, log, threshold, explain=False):
+        self.log = log
+        self.threshold = threshold
+        self.explain = explain
+        self._local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self._local, "explaining", False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                self._record(sql, params, many, context, elapsed)
+
+    def _record(self, sql, params, many, context, elapsed):
+        key, normalized = fingerprint(sql)
+        site = call_site()
+        logger.warning(
+            "Slow query %s (%.1f ms) at %s: %s", key, elapsed * 1000, site, normalized
+        )
+        new = self.log.add(key, normalized, elapsed, site)
+        if new and self.explain and not many and sql.lstrip()[:6].upper() == "SELECT":
+            self.log.set_explain(key, self._explain(context["connection"], sql, params))
+
+    def _explain(self, conn, sql, params):
+        if conn.needs_rollback:
+            return None
+        self._local.explaining = True
+        try:
+            # In a savepoint so a failing EXPLAIN cannot break the
+            # surrounding transaction.
+            with transaction.atomic(using=conn.alias):
+                with conn.cursor() as cursor:
+                    cursor.execute(f"{conn.ops.explain_query_prefix()} {sql}", params)
+                    return [" ".join(map(str, row)) for row in cursor.fetchall()]
+        except Exception as exc:
+            return [f"EXPLAIN failed: {exc}"]
+        finally:
+            self._local.explaining = False
+
+
+class SlowQueryLogMiddleware:
+    """
+    Installs a SlowQueryWrapper around each request, configured by the
+    SLOW_QUERY_LOG setting. Removed at startup when ENABLED is off.
+    """
+
+    def __init__(self, get_response):
+        config = getattr(settings, "SLOW_QUERY_LOG", {})
+        if not config.get("ENABLED"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        query_log.max_fingerprints = config.get("MAX_FINGERPRINTS", 1000)
+        self.wrapper = SlowQueryWrapper(
+            query_log,
+            config.get("THRESHOLD_MS", 100) / 1000,
+            explain=config.get("EXPLAIN", False),
+        )
+
+    def __call__(self, request):
+        with connection.execute_wrapper(self.wrapper):
+            return self.get_response(request)
@@ -1,7 +1,28 @@
+from django.db.models import (
+    BooleanField,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
 
-from authentication.serializers import UserDataSerializer
-from core.models import Comment, Course, Follow, Like, Post, Student, Teacher
+from authentication.serializers import UserSummaryField, UserSummaryListSerializer
+from core.archive import count_with_archive
+from core.models import (
+    ArchivedComment,
+    ArchivedLike,
+    Comment,
+    Course,
+    Follow,
+    Like,
+    Post,
+    Student,
+    Teacher,
+)
 
 
 class PostSerializer(serializers.ModelSerializer):
@@ -11,30 +32,181 @@ class PostSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class PostGetSerializer(serializers.ModelSerializer):
-    user = UserDataSerializer()
+def _query_param_set(request, name):
+    if request is None or name not in request.query_params:
+        return None
+    return {value for value in request.query_params[name].split(",") if value}
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin for ``?fields=a,b`` and ``?expand=x,y``.
+
+    ``fields`` limits the rendered fields. ``expand`` lists which of the
+    ``expandable_fields`` are nested; the others are replaced by the flat
+    field built by their factory, or left out when it is None. Without the
+    parameters everything is rendered and expanded.
+    """
+
+    # Nested field name -> factory for its flat replacement (or None).
+    expandable_fields = {}
+    # Method field name -> model columns it reads from the instance.
+    field_columns = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        rendered, expanded = self.plan(self.context.get("request"))
+        for name in list(self.fields):
+            if name not in rendered:
+                self.fields.pop(name)
+            elif name in self.expandable_fields and name not in expanded:
+                factory = self.expandable_fields[name]
+                if factory is None:
+                    self.fields.pop(name)
+                else:
+                    self.fields[name] = factory()
+
+    @classmethod
+    def plan(cls, request):
+        """
+        Return the names of the fields to render and of the nested fields to
+        expand for ``request``.
+        """
+        available = set(cls._declared_fields)
+        fields = getattr(cls.Meta, "fields", "__all__")
+        if fields == "__all__":
+            exclude = set(getattr(cls.Meta, "exclude", ()))
+            available.update(
+                f.name
+                for f in cls.Meta.model._meta.concrete_fields
+                if f.name not in exclude
+            )
+        else:
+            available.update(fields)
+        fields = _query_param_set(request, "fields")
+        expand = _query_param_set(request, "expand")
+        rendered = available if fields is None else available & fields
+        expandable = rendered & set(cls.expandable_fields)
+        expanded = expandable if expand is None else expandable & expand
+        rendered = {
+            name
+            for name in rendered
+            if name in expanded or cls.expandable_fields.get(name, True) is not None
+        }
+        return rendered, expanded
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        """
+        Load only the columns the requested fields need, and join expanded
+        foreign keys with just the columns of their nested serializer.
+        """
+        rendered, expanded = cls.plan(request)
+        opts = queryset.model._meta
+        concrete = {f.name: f for f in opts.concrete_fields}
+        columns = {opts.pk.name}
+        for name in rendered:
+            if name in cls.field_columns:
+                columns.update(cls.field_columns[name])
+            elif name in concrete:
+                columns.add(name)
+            nested = cls._declared_fields.get(name)
+            if name in expanded and isinstance(nested, serializers.ModelSerializer):
+                queryset = queryset.select_related(name)
+                columns.update(f"{name}__{field}" for field in nested.Meta.fields)
+        return queryset.only(*columns)
+
+
+class PostGetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    user = UserSummaryField()
     count_comments = serializers.SerializerMethodField()
     count_likes = serializers.SerializerMethodField()
     comments = serializers.SerializerMethodField()
     likes = serializers.SerializerMethodField()
+    # Annotated by optimize_queryset for the requesting user.
+    liked_by_me = serializers.BooleanField(read_only=True)
+    my_comment_count = serializers.IntegerField(read_only=True)
+
+    expandable_fields = {
+        "user": lambda: serializers.PrimaryKeyRelatedField(read_only=True),
+        "comments": None,
+        "likes": None,
+    }
+    field_columns = {
+        "count_comments": ["user"],
+        "count_likes": ["user"],
+        "comments": ["user"],
+        "likes": ["user"],
+    }
 
     class Meta:
         model = Post
-        fields = "__all__"
+        # Soft-deleted posts are never served, so the flag is always null.
+        exclude = ["deleted_at"]
+        list_serializer_class = UserSummaryListSerializer
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        rendered, _ = cls.plan(request)
+        queryset = super().optimize_queryset(queryset, request)
+        user = request.user
+        if not user.is_authenticated:
+            user = None
+        if "liked_by_me" in rendered:
+            # Likes older than the archive cutoff live in ArchivedLike.
+            hot = Exists(Like.objects.filter(post=OuterRef("pk"), user=user))
+            cold = Exists(ArchivedLike.objects.filter(post=OuterRef("pk"), user=user))
+            queryset = queryset.annotate(
+                liked_by_me=(
+                    ExpressionWrapper(hot | cold, output_field=BooleanField())
+                    if user
+                    else Value(False)
+                )
+            )
+        if "my_comment_count" in rendered:
+            my_comments = [
+                Coalesce(
+                    Subquery(
+                        model.objects.filter(post=OuterRef("pk"), user=user)
+                        .order_by()
+                        .values("post")
+                        .annotate(total=Count("pk"))
+                        .values("total")
+                    ),
+                    0,
+                )
+                for model in (Comment, ArchivedComment)
+            ]
+            queryset = queryset.annotate(
+                my_comment_count=(my_comments[0] + my_comments[1] if user else Value(0))
+            )
+        return queryset
 
     def get_count_comments(self, obj):
-        return Comment.objects.filter(post__user=obj.user).count()
+        return count_with_archive(
+            Comment, post__user=obj.user_id, post__deleted_at=None
+        )
 
     def get_count_likes(self, obj):
-        return Like.objects.filter(post__user=obj.user).count()
+        return count_with_archive(Like, post__user=obj.user_id, post__deleted_at=None)
 
     def get_comments(self, obj):
-        comments = Comment.objects.filter(post__user=obj.user)
-        return CommentSerializer(comments, many=True).data
+        filters = {"post__user": obj.user_id, "post__deleted_at": None}
+        comments = Comment.objects.filter(**filters)
+        archived = ArchivedComment.objects.filter(**filters)
+        return (
+            CommentSerializer(comments, many=True).data
+            + ArchivedCommentSerializer(archived, many=True).data
+        )
 
     def get_likes(self, obj):
-        comments = Like.objects.filter(post__user=obj.user)
-        return LikeSerializer(comments, many=True).data
+        filters = {"post__user": obj.user_id, "post__deleted_at": None}
+        likes = Like.objects.filter(**filters)
+        archived = ArchivedLike.objects.filter(**filters)
+        return (
+            LikeSerializer(likes, many=True).data
+            + ArchivedLikeSerializer(archived, many=True).data
+        )
 
 
 class LikeSerializer(serializers.ModelSerializer):
@@ -50,6 +222,18 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class ArchivedLikeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedLike
+        exclude = ["archived_at"]
+
+
+class ArchivedCommentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedComment
+        exclude = ["archived_at"]
+
+
 class FollowSerializer(serializers.ModelSerializer):
     class Meta:
         model = Follow
@@ -57,19 +241,21 @@ class FollowSerializer(serializers.ModelSerializer):
 
 
 class FollowersSerializer(serializers.ModelSerializer):
-    user = UserDataSerializer()
+    user = UserSummaryField()
 
     class Meta:
         model = Follow
         fields = ["uuid", "user"]
+        list_serializer_class = UserSummaryListSerializer
 
 
 class FollowingsSerializer(serializers.ModelSerializer):
-    user_following = UserDataSerializer()
+    user_following = UserSummaryField()
 
     class Meta:
         model = Follow
         fields = ["uuid", "user_following"]
+        list_serializer_class = UserSummaryListSerializer
 
 
 class StudentSerializer(serializers.ModelSerializer):
@@ -88,3 +274,27 @@ class TeacherSerializer(serializers.ModelSerializer):
     class Meta:
         model = Teacher
         fields = ["name"]
+
+
+class DirectoryTeacherSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Teacher
+        fields = ["id", "name"]
+
+
+class StudentCourseSerializer(serializers.ModelSerializer):
+    teacher = DirectoryTeacherSerializer()
+
+    class Meta:
+        model = Course
+        fields = ["id", "name", "teacher"]
+
+
+class StudentDirectorySerializer(serializers.ModelSerializer):
+    # Expects courses to be prefetched with their teacher selected, see
+    # StudentFilterAPIView.queryset.
+    courses = StudentCourseSerializer(many=True)
+
+    class Meta:
+        model = Student
+        fields = ["id", "name", "roll", "address", "email", "courses"]
@@ -1,11 +1,17 @@
 # blogging/tasks.py
 
+from datetime import timedelta
 from time import sleep
 
 from celery import shared_task
-from django.core.mail import send_mail
+from django.conf import settings
+from django.core.mail import send_mail, send_mass_mail
+from django.utils import timezone
 
-from .models import Comment, Post
+from authentication.models import User
+
+from . import archive, deletion
+from .models import Comment, Follow, Post
 
 
 # Task for sending email after post creation (simulate email sending delay)
@@ -16,7 +22,7 @@ def send_post_creation_email(post_id):
 
     # Simulate email sending (you would actually use Django's email system)
     subject = "New Post Created!"
-    message = f"Dear {user.username},\n\nYour post titled '{post.title}' has been successfully created!"
+    message = f"Dear {user.first_name},\n\nYour post titled '{post.title}' has been successfully created!"
     recipient_list = [user.email]
 
     # Simulate a delay to demonstrate asynchronous behavior
@@ -29,12 +35,12 @@ def send_post_creation_email(post_id):
 # Task for sending email after comment creation (simulate email sending delay)
 @shared_task
 def send_comment_creation_email(comment_id):
-    comment = Comment.objects.get(id=comment_id)
+    comment = Comment.objects.get(uuid=comment_id)
     post = comment.post  # Get the post the comment belongs to
     user = post.user  # Assuming post has a user field
 
     subject = "New Comment on Your Post!"
-    message = f"Dear {user.username},\n\nA new comment has been posted on your post titled '{post.title}'."
+    message = f"Dear {user.first_name},\n\nA new comment has been posted on your post titled '{post.title}'."
     recipient_list = [user.email]
 
     # Simulate a delay
@@ -42,3 +48,64 @@ def send_comment_creation_email(comment_id):
     send_mail(subject, message, "from@example.com", recipient_list)
 
     return f"Comment creation email sent to {user.email}"
+
+
+# Batched welcome emails for new users, sent over one SMTP connection.
+@shared_task
+def send_welcome_emails(user_ids):
+    users = User.objects.filter(pk__in=user_ids).only("email", "first_name")
+    messages = [
+        (
+            "Welcome!",
+            f"Dear {user.first_name},\n\nYour account has been created.",
+            "from@example.com",
+            [user.email],
+        )
+        for user in users
+    ]
+    return send_mass_mail(messages)
+
+
+# New users follow the DEFAULT_FOLLOW_EMAILS accounts.
+@shared_task
+def create_default_follows(user_ids):
+    followed = User.objects.filter(
+        email__in=settings.DEFAULT_FOLLOW_EMAILS, is_active=True
+    ).values_list("pk", flat=True)
+    follows = [
+        Follow(user_id=user_id, user_following_id=following_id)
+        for user_id in user_ids
+        for following_id in followed
+        if user_id != following_id
+    ]
+    Follow.objects.bulk_create(follows, ignore_conflicts=True)
+    return len(follows)
+
+
+@shared_task
+def purge_deleted_post(post_id):
+    deletion.purge_post(post_id)
+
+
+@shared_task
+def purge_deleted_user(user_id):
+    deletion.purge_user(user_id)
+
+
+# Safety net for purge tasks that were lost, e.g. a worker killed mid-task.
+@shared_task
+def purge_soft_deleted(older_than=3600):
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    for post_id in Post.all_objects.filter(deleted_at__lt=cutoff).values_list(
+        "pk", flat=True
+    )[:1000]:
+        deletion.purge_post(post_id)
+    for user_id in User.objects.filter(deleted_at__lt=cutoff).values_list(
+        "pk", flat=True
+    )[:100]:
+        deletion.purge_user(user_id)
+
+
+@shared_task
+def archive_old_activity():
+    archive.archive_old_activity()
@@ -1,9 +1,12 @@
+import io
+
 import pytest
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Like, Post
+from core import outbox
+from core.models import Comment, Course, Like, OutboxMessage, Post, Student, Teacher
 
 User = get_user_model()
 
@@ -32,6 +35,15 @@ def test_create_post_success():
 
 
 # ---------------------------------------------------------------------------
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached counts and summaries must not leak between tests"""
+    from django.core.cache import cache
+
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def user(db):
     """Fixture to create a user for testing"""
@@ -225,3 +237,1263 @@ def test_update_post_success():
 
     assert post.title == updated_data["title"]
     assert post.content == updated_data["content"]
+
+# ---------------------------------------------------------------------------------------
+def test_email_tasks_are_routed_to_notifications_queue():
+    """
+    Email tasks must not share a queue with fan-out and maintenance work.
+    """
+    from SocialApp.celery import app
+
+    route = app.amqp.router.route({}, "core.tasks.send_comment_creation_email")
+    assert route["queue"].name == "notifications"
+
+    route = app.amqp.router.route({}, "core.tasks.create_default_follows")
+    assert route["queue"].name == "fanout"
+
+    route = app.amqp.router.route({}, "SocialApp.celery.debug_task")
+    assert route["queue"].name == "default"
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_create_comment_writes_outbox_message(auth_client, post, monkeypatch):
+    """
+    Creating a comment must not talk to the broker; the relay publishes the
+    email task from the outbox afterwards.
+    """
+    from SocialApp.celery import app
+
+    sent = []
+    monkeypatch.setattr(app, "send_task", lambda name, **kw: sent.append((name, kw)))
+
+    response = auth_client.post(
+        "/api/comment/create/",
+        data={"post": str(post.uuid), "content": "Nice post"},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert sent == []
+    comment = Comment.objects.get(post=post)
+    message = OutboxMessage.objects.get()
+    assert message.task_name == "core.tasks.send_comment_creation_email"
+    assert message.args == [str(comment.uuid)]
+
+    assert outbox.relay(once=True) == 1
+    assert sent[0][0] == "core.tasks.send_comment_creation_email"
+    assert sent[0][1]["task_id"] == str(message.uuid)
+    assert not OutboxMessage.objects.exists()
+
+
+@pytest.mark.django_db
+def test_relay_runs_tasks_eagerly_under_local_profile(user, monkeypatch, mailoutbox):
+    """
+    CELERY_PROFILE=local has no worker, so the relay runs the task itself.
+    """
+    from SocialApp.celery import app
+
+    monkeypatch.setattr(app.conf, "task_always_eager", True)
+    monkeypatch.setattr(app, "send_task", lambda *a, **kw: pytest.fail("sent"))
+    outbox.enqueue("core.tasks.send_welcome_emails", [user.pk])
+
+    assert outbox.relay(once=True) == 1
+    assert [m.to for m in mailoutbox] == [[user.email]]
+    assert not OutboxMessage.objects.exists()
+
+
+def test_task_result_policies(monkeypatch):
+    """
+    Email tasks are fire-and-forget; inspectable tasks expire their result
+    after their own result_ttl.
+    """
+    import core.tasks  # noqa: F401  registers the shared tasks
+    from SocialApp.celery import app, debug_task
+
+    assert app.tasks["core.tasks.send_comment_creation_email"].ignore_result
+    assert not debug_task.ignore_result
+
+    expired = []
+    monkeypatch.setattr(
+        type(debug_task.backend),
+        "expire",
+        lambda self, key, ttl: expired.append((key, ttl)),
+        raising=False,
+    )
+    debug_task.after_return("SUCCESS", None, "abc", (), {}, None)
+
+    assert expired == [(debug_task.backend.get_key_for_task("abc"), 300)]
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_student_admin_prefetches_courses(rf, django_assert_num_queries):
+    """
+    Rendering the courses column must not run one query per student.
+    """
+    from django.contrib.admin.sites import site
+
+    teacher = Teacher.objects.create(name="Teacher")
+    courses = [Course.objects.create(name=f"C{i}", teacher=teacher) for i in range(3)]
+    for i in range(5):
+        student = Student.objects.create(
+            name=f"S{i}", roll=str(i), address="-", email=f"s{i}@example.com"
+        )
+        student.courses.set(courses)
+
+    student_admin = site._registry[Student]
+    with django_assert_num_queries(2):
+        rows = [
+            student_admin.display_courses(student)
+            for student in student_admin.get_queryset(rf.get("/"))
+        ]
+    assert rows == ["C0, C1, C2"] * 5
+
+
+@pytest.mark.django_db
+def test_estimated_count_paginator(monkeypatch, user, multiple_posts):
+    """
+    Unfiltered querysets use the table estimate, filtered ones count exactly.
+    """
+    from core import CustomPagination
+
+    monkeypatch.setattr(
+        CustomPagination, "estimated_row_count", lambda model, using: 2_000_000
+    )
+
+    paginator = CustomPagination.EstimatedCountPaginator(
+        Post.objects.order_by("pk"), 10
+    )
+    assert paginator.count == 2_000_000
+
+    filtered = Post.objects.filter(title="Post 1").order_by("pk")
+    paginator = CustomPagination.EstimatedCountPaginator(filtered, 10)
+    assert paginator.count == 1
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.fixture
+def enrollments(db):
+    ada = Teacher.objects.create(name="Ada")
+    alan = Teacher.objects.create(name="Alan")
+    math = Course.objects.create(name="Math", teacher=ada)
+    logic = Course.objects.create(name="Logic", teacher=ada)
+    physics = Course.objects.create(name="Physics", teacher=alan)
+    students = []
+    for i in range(4):
+        student = Student.objects.create(
+            name=f"S{i}", roll=str(i), address="-", email=f"s{i}@example.com"
+        )
+        student.courses.set([math, logic] if i % 2 else [physics])
+        students.append(student)
+    return {"teachers": [ada, alan], "courses": [math, logic, physics]}
+
+
+@pytest.mark.django_db
+def test_student_list_filters_with_bounded_queries(
+    auth_client, enrollments, django_assert_max_num_queries
+):
+    """
+    Filtering by teacher returns each student once, and nested courses are
+    prefetched instead of loaded per student.
+    """
+    ada = enrollments["teachers"][0]
+
+    with django_assert_max_num_queries(3):
+        response = auth_client.get(f"/api/students/?teacher={ada.id}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["count"] == 2
+    student = response.data["results"][0]
+    assert {course["name"] for course in student["courses"]} == {"Math", "Logic"}
+    assert student["courses"][0]["teacher"]["name"] == "Ada"
+
+    response = auth_client.get("/api/student/email/S2@example.com/")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["roll"] == "2"
+
+    for param in ("course", "teacher"):
+        response = auth_client.get(f"/api/students/?{param}=abc")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_total_students(auth_client, enrollments):
+    response = auth_client.get("/api/students/total/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["total_students"] == 4
+    assert [c["total_students"] for c in response.data["courses"]] == [2, 2, 2]
+    assert [
+        (t["total_courses"], t["total_students"]) for t in response.data["teachers"]
+    ] == [(2, 2), (1, 2)]
+
+
+@pytest.mark.django_db
+def test_import_students_upserts_and_enrolls(enrollments):
+    """
+    Rows are upserted by roll, enrollments are added in bulk and conflicting
+    or invalid rows are reported instead of aborting the import.
+    """
+    from core.importers import import_students, iter_rows
+
+    math, logic, physics = enrollments["courses"]
+    data = (
+        "roll,name,email,address,courses\n"
+        f"0,Renamed,s0@example.com,Street,{math.id};Logic\n"
+        "100,New,new@example.com,,Physics\n"
+        "101,Taken,s1@example.com,,\n"
+        "102,Bad,not-an-email,,\n"
+    )
+    report = import_students(iter_rows(io.BytesIO(data.encode()), "csv"), 2)
+
+    assert report.rows == 4
+    assert report.students == 2
+    assert report.skipped == 2
+    assert [error["line"] for error in report.errors] == [5, 4]
+
+    renamed = Student.objects.get(roll="0")
+    assert renamed.name == "Renamed"
+    assert set(renamed.courses.values_list("name", flat=True)) == {
+        "Math",
+        "Logic",
+        "Physics",
+    }
+    assert list(
+        Student.objects.get(roll="100").courses.values_list("name", flat=True)
+    ) == ["Physics"]
+    assert not Student.objects.filter(roll__in=["101", "102"]).exists()
+
+
+@pytest.mark.django_db
+def test_import_students_reports_swapped_emails(enrollments):
+    """
+    An email can move to another roll in the same chunk once its holder's
+    row moves it elsewhere, whatever the row order; swapped emails can't be
+    written and are reported.
+    """
+    from core.importers import import_students, iter_rows
+
+    data = (
+        "roll,name,email\n"
+        "0,S0,s1@example.com\n"
+        "1,S1,s0@example.com\n"
+        "3,S3,s2@example.com\n"
+        "2,S2,fresh@example.com\n"
+    )
+    report = import_students(iter_rows(io.BytesIO(data.encode()), "csv"))
+
+    assert report.students == 2
+    assert sorted(error["line"] for error in report.errors) == [2, 3]
+    assert "swapped" in report.errors[0]["msg"]
+    emails = dict(Student.objects.values_list("roll", "email"))
+    assert emails == {
+        "0": "s0@example.com",
+        "1": "s1@example.com",
+        "2": "fresh@example.com",
+        "3": "s2@example.com",
+    }
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_retrieve_post_conditional_get(
+    auth_client, user, post, django_assert_num_queries
+):
+    """
+    A matching If-None-Match is answered with 304 from a single validator
+    query, and new activity on the author's posts changes the ETag.
+    """
+    url = f"/api/post/get/{post.uuid}/"
+    response = auth_client.get(url)
+    etag = response["ETag"]
+    assert response.status_code == status.HTTP_200_OK
+    assert response.has_header("Last-Modified")
+
+    with django_assert_num_queries(1):
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    Comment.objects.create(user=user, post=post, content="New")
+    response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+
+    # Archived likes are rendered too, so adding or purging one counts.
+    from core.models import ArchivedLike
+
+    for target in (url, f"/api/comments/post/{post.uuid}/"):
+        etag = auth_client.get(target)["ETag"]
+        archived = ArchivedLike.objects.create(
+            uuid=post.uuid, user=user, post=post, created_at=post.created_at
+        )
+        response = auth_client.get(target, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        archived.delete()
+        response = auth_client.get(target, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_deleting_a_comment_moves_last_modified(auth_client, user, post):
+    """
+    A client revalidating with If-Modified-Since only sees a deleted comment
+    disappear, although deletes leave no timestamp behind.
+    """
+    from datetime import datetime, timezone
+
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    first, _ = (
+        Comment.objects.create(user=user, post=post, content=str(i)) for i in range(2)
+    )
+    Comment.objects.update(updated_at=old)
+    Post.objects.update(updated_at=old)
+    url = f"/api/comments/post/{post.uuid}/"
+    last_modified = auth_client.get(url)["Last-Modified"]
+
+    response = auth_client.delete(f"/api/comment/delete/{first.uuid}/")
+    assert response.status_code == status.HTTP_200_OK
+
+    response = auth_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["Count Of Comments"] == 1
+
+
+@pytest.mark.django_db
+def test_post_list_sparse_fieldsets(user, multiple_posts, django_assert_num_queries):
+    """
+    ?fields= and ?expand= limit the rendered fields, and unrequested nested
+    data is never queried.
+    """
+    client = APIClient()
+
+    with django_assert_num_queries(1) as captured:
+        response = client.get("/api/post/list/?fields=uuid,title")
+    assert response.status_code == status.HTTP_200_OK
+    assert [set(post) for post in response.data] == [{"uuid", "title"}] * 3
+    assert "content" not in captured.captured_queries[0]["sql"]
+
+    with django_assert_num_queries(1):
+        response = client.get("/api/post/list/?fields=title,user&expand=")
+    assert response.data[0]["user"] == user.id
+
+    # Authors come from the user summary cache, loaded in one query when cold.
+    with django_assert_num_queries(2):
+        response = client.get("/api/post/list/?fields=title,user,comments&expand=user")
+    assert set(response.data[0]) == {"title", "user"}
+    assert response.data[0]["user"]["email"] == user.email
+
+    with django_assert_num_queries(1):
+        client.get("/api/post/list/?fields=title,user&expand=user")
+
+    response = client.get("/api/post/list/?fields=title,deleted_at")
+    assert [set(post) for post in response.data] == [{"title"}] * 3
+    assert "deleted_at" not in client.get("/api/post/list/").data[0]
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_comment_create_is_throttled(auth_client, post, settings):
+    """
+    Write endpoints listed in TOKEN_BUCKET_THROTTLE answer 429 with
+    Retry-After once the user's bucket is empty.
+    """
+    settings.TOKEN_BUCKET_THROTTLE = {"RATES": {"commentcreate": "2/min"}}
+    payload = {"post": str(post.uuid), "content": "Spam"}
+
+    for _ in range(2):
+        response = auth_client.post("/api/comment/create/", payload, format="json")
+        assert response.status_code == status.HTTP_201_CREATED
+
+    response = auth_client.post("/api/comment/create/", payload, format="json")
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert 0 < int(response["Retry-After"]) <= 30
+
+    # Other endpoints are not throttled.
+    assert auth_client.get(f"/api/post/get/{post.uuid}/").status_code == 200
+
+
+def test_local_token_buckets_are_bounded(monkeypatch):
+    """
+    Past max_keys, refilled buckets are dropped first, then the least
+    recently used ones, whatever the rate's period.
+    """
+    from core import throttling
+
+    now = [0.0]
+    monkeypatch.setattr(throttling.time, "monotonic", lambda: now[0])
+    backend = throttling.LocalTokenBucketBackend()
+    backend.max_keys = 2
+    per_day = throttling.parse_rate("2/day")
+
+    backend.consume("a", 1.0, 1)
+    backend.consume("b", *per_day)
+    now[0] = 10.0
+    backend.consume("c", *per_day)
+    # "a" refilled after a second and goes; "b" needs half a day.
+    assert list(backend._buckets) == ["b", "c"]
+
+    backend.consume("d", *per_day)
+    assert list(backend._buckets) == ["c", "d"]
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_create_post_idempotency_key(auth_client):
+    """
+    A retry with the same Idempotency-Key replays the first response instead
+    of creating a second post; reusing the key for another body is rejected.
+    """
+    payload = {"title": "Once", "content": "Only once"}
+    headers = {"HTTP_IDEMPOTENCY_KEY": "retry-1"}
+
+    first = auth_client.post("/api/post/create/", payload, format="json", **headers)
+    retry = auth_client.post("/api/post/create/", payload, format="json", **headers)
+
+    assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+    assert retry.data == first.data
+    assert retry["Idempotent-Replayed"] == "true"
+    assert Post.objects.filter(title="Once").count() == 1
+
+    payload["title"] = "Changed"
+    response = auth_client.post("/api/post/create/", payload, format="json", **headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert not Post.objects.filter(title="Changed").exists()
+
+
+def test_shared_cache_check(settings):
+    """
+    Without a shared cache, idempotency keys only work per worker, which the
+    system checks warn about outside DEBUG.
+    """
+    from core.checks import check_shared_cache
+
+    settings.DEBUG = False
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    assert [warning.id for warning in check_shared_cache(None)] == ["core.W001"]
+
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://localhost:6379/0",
+        }
+    }
+    assert check_shared_cache(None) == []
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_batch_runs_sub_requests(auth_client, post):
+    """
+    Several reads are answered in one request, each with its own status.
+    """
+    response = auth_client.post(
+        "/api/batch/",
+        {
+            "requests": [
+                {"path": f"/api/post/get/{post.uuid}/?fields=title"},
+                {"path": f"comments/post/{post.uuid}/"},
+                {"path": "post/list/"},
+            ]
+        },
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    first, second, third = response.data["responses"]
+    assert first == {"status": 200, "body": {"title": post.title}}
+    assert second["status"] == 404
+    assert third["status"] == 200 and len(third["body"]) == 1
+
+    response = auth_client.post(
+        "/api/batch/", {"requests": [{"path": "nope/"}]}, format="json"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("parallel", [False, True])
+def test_batch_isolates_failing_sub_requests(auth_client, post, monkeypatch, parallel):
+    """
+    An unhandled error in one sub-request only fails that entry, and the
+    batch's conditional headers are not applied to its entries.
+    """
+    from core.views import PostListAPIView
+
+    def broken(self):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(PostListAPIView, "get_queryset", broken)
+    # The error is still reported through got_request_exception.
+    auth_client.raise_request_exception = False
+    response = auth_client.post(
+        "/api/batch/",
+        {
+            "requests": [{"path": "post/list/"}, {"path": f"post/get/{post.uuid}/"}],
+            "parallel": parallel,
+        },
+        format="json",
+        HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    failed, ok = response.data["responses"]
+    assert failed["status"] == 500
+    assert ok["status"] == 200 and ok["body"]["title"] == post.title
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_post_list_liked_by_me(
+    auth_client, user, multiple_posts, django_assert_num_queries
+):
+    """
+    The like state and the user's comment count come from annotations, not
+    from one query per post.
+    """
+    liked, commented, _ = multiple_posts
+    Like.objects.create(user=user, post=liked)
+    Comment.objects.create(user=user, post=commented, content="a")
+    Comment.objects.create(user=user, post=commented, content="b")
+
+    with django_assert_num_queries(1):
+        response = auth_client.get(
+            "/api/post/list/?fields=title,liked_by_me,my_comment_count"
+        )
+
+    rows = {row["title"]: row for row in response.data}
+    assert rows[liked.title]["liked_by_me"] is True
+    assert rows[commented.title]["liked_by_me"] is False
+    assert rows[commented.title]["my_comment_count"] == 2
+    assert rows[liked.title]["my_comment_count"] == 0
+
+    response = APIClient().get("/api/post/list/?fields=liked_by_me")
+    assert [row["liked_by_me"] for row in response.data] == [False] * 3
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_like_list_is_scoped_and_filtered(auth_client, user, multiple_posts):
+    """
+    Without filters only the requesting user's likes are listed; ?post= and
+    ?since= narrow the list.
+    """
+    other = User.objects.create_user(
+        email="other@example.com",
+        password="pass",
+        first_name="Other",
+        last_name="User",
+        gender="F",
+    )
+    first, second, _ = multiple_posts
+    Like.objects.create(user=user, post=first)
+    Like.objects.create(user=other, post=first)
+    Like.objects.create(user=other, post=second)
+
+    response = auth_client.get("/api/like/list/")
+    assert response.data["count"] == 1
+    assert response.data["results"][0]["user"] == user.id
+
+    response = auth_client.get(f"/api/like/list/?post={first.uuid}")
+    assert response.data["count"] == 2
+
+    response = auth_client.get("/api/like/list/?user=%d&since=2999-01-01" % other.id)
+    assert response.data["count"] == 0
+
+    response = auth_client.get("/api/like/list/?since=yesterday")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_delete_post_is_soft_and_purged_in_batches(auth_client, user, post, settings):
+    """
+    Deleting a post hides it immediately; its likes and comments are removed
+    later by the purge task, a batch at a time.
+    """
+    from core.tasks import purge_deleted_post
+
+    settings.PURGE_BATCH_SIZE = 2
+    for i in range(5):
+        Comment.objects.create(user=user, post=post, content=str(i))
+    Like.objects.create(user=user, post=post)
+
+    response = auth_client.delete(f"/api/post/delete/{post.uuid}/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert not Post.objects.filter(uuid=post.uuid).exists()
+    assert Post.all_objects.filter(uuid=post.uuid).exists()
+    assert Comment.objects.filter(post=post).count() == 5
+    # Until the purge runs, the post's comments and likes are hidden too.
+    response = auth_client.get(f"/api/comments/post/{post.uuid}/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    response = auth_client.get(f"/api/comments/user/{user.id}/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    response = auth_client.get("/api/like/list/")
+    assert response.data["count"] == 0
+    response = auth_client.get(f"/api/like/get/{Like.objects.get().uuid}/")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    message = OutboxMessage.objects.get()
+    assert message.task_name == "core.tasks.purge_deleted_post"
+
+    purge_deleted_post(*message.args)
+
+    assert not Post.all_objects.filter(uuid=post.uuid).exists()
+    assert not Comment.objects.exists() and not Like.objects.exists()
+
+
+@pytest.mark.django_db
+def test_delete_user_deactivates_and_purges(auth_client, user, post):
+    from core.tasks import purge_deleted_user
+
+    response = auth_client.delete("/api/user/delete/")
+
+    assert response.status_code == status.HTTP_200_OK
+    user.refresh_from_db()
+    assert not user.is_active and user.deleted_at is not None
+    assert not Post.objects.exists()
+
+    purge_deleted_user(user.pk)
+
+    assert not User.objects.filter(pk=user.pk).exists()
+    assert not Post.all_objects.exists()
+
+
+@pytest.mark.django_db
+def test_deleted_users_activity_is_hidden(auth_client, user, post):
+    """
+    Until the purge runs, a deleted user's likes, comments and follows on
+    other users' content are neither listed nor counted.
+    """
+    from authentication.summaries import get_summaries
+    from core.deletion import soft_delete_user
+    from core.models import ArchivedComment, Follow
+
+    gone = User.objects.create_user(
+        email="gone@example.com", first_name="G", last_name="G", gender="F"
+    )
+    like = Like.objects.create(user=gone, post=post)
+    Comment.objects.create(user=gone, post=post, content="hot")
+    ArchivedComment.objects.create(
+        uuid=like.uuid,
+        user=gone,
+        post=post,
+        content="cold",
+        created_at=post.created_at,
+        updated_at=post.created_at,
+    )
+    Comment.objects.create(user=user, post=post, content="mine")
+    Follow.objects.create(user=gone, user_following=user)
+    Follow.objects.create(user=user, user_following=gone)
+    assert gone.pk in get_summaries([gone.pk])
+
+    soft_delete_user(gone)
+
+    response = auth_client.get(f"/api/comments/post/{post.uuid}/")
+    assert response.data["Count Of Comments"] == 1
+    assert response.data["Count Of Likes"] == 0
+    response = auth_client.get(f"/api/post/get/{post.uuid}/")
+    assert response.data["count_comments"] == 1 and response.data["count_likes"] == 0
+    assert auth_client.get(f"/api/like/list/?post={post.uuid}").data["count"] == 0
+    response = auth_client.get(f"/api/like/get/{like.uuid}/")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = auth_client.get(f"/api/followers/user/{user.id}/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    response = auth_client.get(f"/api/followings/user/{user.id}/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert get_summaries([gone.pk]) == {}
+    assert Comment.all_objects.filter(user=gone).exists()
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_archive_old_activity_keeps_counts(auth_client, user, post):
+    """
+    Old likes and comments move to the archive tables in batches while the
+    counts and the comment list still include them.
+    """
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from core.archive import archive_old_activity
+    from core.models import ArchivedComment, ArchivedLike
+
+    old = timezone.now() - timedelta(days=400)
+    Like.objects.create(user=user, post=post)
+    for i in range(3):
+        Comment.objects.create(user=user, post=post, content=str(i))
+    Like.objects.update(created_at=old)
+    Comment.objects.filter(content__in=["0", "1"]).update(created_at=old)
+
+    moved = archive_old_activity(batch_size=1)
+
+    assert moved == {"core_like": 1, "core_comment": 2}
+    assert Comment.objects.count() == 1 and ArchivedComment.objects.count() == 2
+    assert not Like.objects.exists() and ArchivedLike.objects.exists()
+
+    response = auth_client.get(f"/api/comments/post/{post.uuid}/")
+    assert response.data["Count Of Comments"] == 3
+    assert response.data["Count Of Likes"] == 1
+
+    response = auth_client.get(
+        f"/api/post/get/{post.uuid}/",
+        {"fields": "count_likes,liked_by_me,my_comment_count,likes,comments"},
+    )
+    assert response.data["count_likes"] == 1
+    assert response.data["liked_by_me"] is True
+    assert response.data["my_comment_count"] == 3
+    assert len(response.data["likes"]) == 1 and len(response.data["comments"]) == 3
+
+    response = auth_client.post(
+        "/api/like/create/", {"post": str(post.uuid)}, format="json"
+    )
+    assert response.data["msg"] == "Already Liked!"
+
+    response = auth_client.get("/api/like/list/?until=2020-01-01T00:00:00Z")
+    assert response.data["count"] == 0
+    until = (timezone.now() - timedelta(days=365)).isoformat()
+    response = auth_client.get("/api/like/list/", {"until": until})
+    assert response.data["count"] == 1
+    # The default list and ranges spanning the cutoff read both tables.
+    Like.objects.create(user=user, post=Post.objects.create(user=user, title="2"))
+    response = auth_client.get("/api/like/list/")
+    assert response.data["count"] == 2
+    assert response.data["results"][-1]["post"] == post.uuid
+    since = (timezone.now() - timedelta(days=500)).isoformat()
+    response = auth_client.get("/api/like/list/", {"since": since})
+    assert response.data["count"] == 2
+    since = (timezone.now() - timedelta(days=1)).isoformat()
+    response = auth_client.get("/api/like/list/", {"since": since})
+    assert response.data["count"] == 1
+
+
+# ---------------------------------------------------------------------------------------
+def test_uuid7_is_time_ordered():
+    import uuid
+
+    from core.ids import uuid7
+
+    keys = [uuid7() for _ in range(1000)]
+
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+    assert all(key.version == 7 and key.variant == uuid.RFC_4122 for key in keys)
+    assert uuid7(1_700_000_000.5).int >> 80 == 1_700_000_000_500
+
+
+@pytest.mark.django_db
+def test_rekey_uuid7_rewrites_post_and_references(user, post):
+    import uuid
+
+    from django.core.management import call_command
+
+    like = Like.objects.create(user=user, post=post)
+    comment = Comment.objects.create(user=user, post=post, content="hi")
+    old = uuid.uuid4()
+    Post.objects.filter(pk=post.pk).update(uuid=old)
+    Like.objects.filter(pk=like.pk).update(post=old)
+    Comment.objects.filter(pk=comment.pk).update(post=old)
+
+    call_command("rekey_uuid7", stdout=io.StringIO())
+
+    new = Post.objects.get()
+    assert new.uuid != old and new.uuid.version == 7
+    assert new.uuid.int >> 80 == int(new.created_at.timestamp() * 1000)
+    assert Like.objects.get().post_id == new.uuid
+    assert Comment.objects.get().post_id == new.uuid
+
+
+@pytest.mark.django_db
+def test_rekey_uuid7_batches_rows_sharing_a_timestamp(user, post):
+    import uuid
+
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    comments = Comment.objects.bulk_create(
+        Comment(uuid=uuid.uuid4(), user=user, post=post, content=str(i))
+        for i in range(7)
+    )
+    Comment.objects.update(created_at=post.created_at)
+    old = uuid.uuid4()
+    Post.objects.filter(pk=post.pk).update(uuid=old)
+    Comment.objects.update(post=old)
+    outbox.enqueue("core.tasks.purge_deleted_post", str(old))
+    outbox.enqueue("core.tasks.send_comment_creation_email", str(comments[0].pk))
+
+    with CaptureQueriesContext(connection) as ctx:
+        call_command("rekey_uuid7", "--batch-size=3", stdout=io.StringIO())
+
+    rewrites = [
+        q["sql"]
+        for q in ctx.captured_queries
+        if q["sql"].startswith('UPDATE "core_comment" SET "uuid"')
+    ]
+    assert len(rewrites) == 3
+    new_post = Post.objects.get().pk
+    new_comments = {str(pk) for pk in Comment.objects.values_list("pk", flat=True)}
+    assert len(new_comments) == 7
+    assert all(uuid.UUID(pk).version == 7 for pk in new_comments)
+    args = dict(OutboxMessage.objects.values_list("task_name", "args"))
+    assert args["core.tasks.purge_deleted_post"] == [str(new_post)]
+    assert args["core.tasks.send_comment_creation_email"][0] in new_comments
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_followers_use_cached_user_summaries(
+    auth_client, user, django_assert_num_queries
+):
+    """
+    Nested users on a page are resolved with one multi-get, loading the misses
+    in a single query, and saving a user drops its cached summary.
+    """
+    from core.models import Follow
+
+    followers = [
+        User.objects.create_user(
+            email=f"f{i}@example.com", first_name=f"F{i}", last_name="L", gender="M"
+        )
+        for i in range(3)
+    ]
+    for follower in followers:
+        Follow.objects.create(user=follower, user_following=user)
+    url = f"/api/followers/user/{user.id}/"
+
+    # ETag validator, Follow rows and the three users; not one query per row.
+    with django_assert_num_queries(3):
+        response = auth_client.get(url)
+    assert {row["user"]["email"] for row in response.data} == {
+        f.email for f in followers
+    }
+
+    with django_assert_num_queries(2):
+        auth_client.get(url)
+
+    followers[0].first_name = "Renamed"
+    followers[0].save()
+    response = auth_client.get(url)
+    assert "Renamed" in {row["user"]["first_name"] for row in response.data}
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_provision_users_in_bulk(user, settings, tmp_path, monkeypatch):
+    """
+    Admins create many users in one request and the side effects are queued
+    as batched tasks; the command hashes passwords in a process pool.
+    """
+    import json
+
+    from django.core.management import call_command
+
+    from authentication import provisioning
+    from core.tasks import create_default_follows
+
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    settings.DEFAULT_FOLLOW_EMAILS = [user.email]
+    admin = User.objects.create_superuser(
+        email="admin@example.com", first_name="A", last_name="B", gender="F"
+    )
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    users = [
+        {
+            "email": f"new{i}@example.com",
+            "first_name": "New",
+            "last_name": str(i),
+            "gender": "F",
+            "password": f"secret{i}",
+        }
+        for i in range(5)
+    ]
+    users.append(dict(users[0], email=user.email))
+    users.append({"email": "broken"})
+
+    response = client.post("/api/user/provision/", {"users": users}, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["users"] == 5 and response.data["skipped"] == 2
+    created = User.objects.get(email="new3@example.com")
+    assert created.check_password("secret3")
+    messages = OutboxMessage.objects.order_by("task_name")
+    assert [m.task_name for m in messages] == [
+        "core.tasks.create_default_follows",
+        "core.tasks.send_welcome_emails",
+    ]
+    assert len(messages[0].args[0]) == 5
+
+    create_default_follows(*messages[0].args)
+    assert created.user.filter(user_following=user).exists()
+
+    settings.PROVISION_MAX_API_ROWS = 6
+    response = client.post("/api/user/provision/", {"users": users}, format="json")
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    assert User.objects.count() == 7
+
+    # An email registered between the existence check and the insert.
+    hash_passwords = provisioning._hash_passwords
+
+    def register_first(*args):
+        User.objects.create_user(
+            email="race@x.com", first_name="R", last_name="R", gender="F"
+        )
+        return hash_passwords(*args)
+
+    OutboxMessage.objects.all().delete()
+    rows = [dict(users[0], email=email) for email in ("race@x.com", "won@x.com")]
+    with monkeypatch.context() as patch:
+        patch.setattr(provisioning, "_hash_passwords", register_first)
+        report = provisioning.provision_users(enumerate(rows, start=1)).as_dict()
+    assert report["users"] == 1
+    assert report["errors"] == [
+        {"line": 1, "msg": "Email 'race@x.com' already exists"}
+    ]
+    won = User.objects.get(email="won@x.com")
+    assert OutboxMessage.objects.filter(args=[[won.pk]]).count() == 2
+
+    path = tmp_path / "users.jsonl"
+    path.write_text(
+        "".join(
+            json.dumps(dict(row, email=f"cli{i}@x.com")) + "\n"
+            for i, row in enumerate(users[:5])
+        )
+    )
+    call_command("provision_users", str(path), "--workers=2", stdout=io.StringIO())
+    assert User.objects.get(email="cli4@x.com").check_password("secret4")
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_buffered_token_issuance(user, settings):
+    """
+    In buffered mode login answers without inserting the OutstandingToken
+    row; the flush writes it, and a token blacklisted before that still is.
+    """
+    from rest_framework_simplejwt.token_blacklist.models import (
+        BlacklistedToken,
+        OutstandingToken,
+    )
+
+    from authentication.tokens import get_buffer
+
+    settings.TOKEN_ISSUANCE = {
+        "MODE": "buffered",
+        "OPTIONS": {"batch_size": 100, "flush_interval": None},
+    }
+    client = APIClient()
+    credentials = {"email": user.email, "password": "strongpassword123"}
+
+    first = client.post("/api/user/login/", credentials, format="json")
+    second = client.post("/api/user/login/", credentials, format="json")
+    assert first.status_code == status.HTTP_200_OK
+    assert not OutstandingToken.objects.exists()
+
+    client.force_authenticate(user=user)
+    response = client.post(
+        "/api/user/logout/",
+        {"refresh": first.data["token"]["refresh"]},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    assert get_buffer().flush() == 2
+    assert OutstandingToken.objects.count() == 2
+    assert BlacklistedToken.objects.get().token.token == first.data["token"]["refresh"]
+    assert second.data["token"]["refresh"] in OutstandingToken.objects.values_list(
+        "token", flat=True
+    )
+
+
+@pytest.mark.django_db
+def test_token_buffer_keeps_records_when_a_flush_fails(user, monkeypatch):
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+    from authentication import tokens
+
+    buffer = tokens.LocalOutstandingTokenBuffer(flush_interval=None)
+    with monkeypatch.context() as patched:
+        patched.setattr(tokens, "_write", lambda records: 1 / 0)
+        buffer.add([user.pk, "jti", "token", 1_700_000_000, 1_800_000_000])
+        with pytest.raises(ZeroDivisionError):
+            buffer.flush()
+
+    assert buffer.flush() == 1
+    assert OutstandingToken.objects.get().jti == "jti"
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_activity_is_written_behind_and_cleans_up(user, settings):
+    """
+    Authenticated requests record the user as seen in memory; the flush
+    writes last_seen_at in bulk, which drives online counts and cleanup.
+    """
+    from datetime import timedelta
+
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from authentication.activity import get_tracker
+    from authentication.views import get_tokens_for_user
+
+    settings.ACTIVITY_TRACKING = {"OPTIONS": {"flush_interval": None}}
+    client = APIClient()
+    access = get_tokens_for_user(user)["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    client.get("/api/post/list/")
+    client.get("/api/post/list/")
+    user.refresh_from_db()
+    assert user.last_seen_at is None
+
+    assert get_tracker().flush() == 1
+    user.refresh_from_db()
+    assert user.last_seen_at is not None
+    assert client.get("/api/user/online/").data["online"] == 1
+
+    get_tracker().flush()
+    User.objects.filter(pk=user.pk).update(
+        last_seen_at=timezone.now() - timedelta(days=400)
+    )
+    # Not seen since before tracking existed, but updated recently.
+    old = User.objects.create_user(
+        email="old@example.com", first_name="O", last_name="O", gender="F"
+    )
+    User.objects.filter(pk=old.pk).update(
+        created_at=timezone.now() - timedelta(days=800)
+    )
+    call_command("deactivate_inactive_users", stdout=io.StringIO())
+    user.refresh_from_db()
+    assert not user.is_active
+    old.refresh_from_db()
+    assert old.is_active and old.last_seen_at is None
+
+    User.objects.filter(pk=old.pk).update(
+        updated_at=timezone.now() - timedelta(days=400)
+    )
+    call_command("deactivate_inactive_users", stdout=io.StringIO())
+    old.refresh_from_db()
+    assert not old.is_active
+
+
+def test_flush_thread_retries_after_errors():
+    """
+    The shared write-behind thread starts once, keeps flushing after a
+    failed flush and isn't started without an interval.
+    """
+    import threading
+
+    from core.backends import FlushThread
+
+    calls = []
+    done = threading.Event()
+
+    def flush():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database down")
+        done.set()
+
+    flusher = FlushThread(flush, 0.01, "Test flush failed")
+    flusher.ensure_started()
+    flusher.ensure_started()
+    assert done.wait(5)
+    assert flusher._thread.is_alive()
+
+    idle = FlushThread(flush, None, "Test flush failed")
+    idle.ensure_started()
+    assert idle._thread is None
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_sampling_profiler_writes_collapsed_stacks(settings, tmp_path, monkeypatch):
+    """
+    A request carrying the profiling header is sampled and its collapsed
+    stacks are appended to the file for its URL name; others are not.
+    """
+    import time
+
+    from core.views import PostListAPIView
+
+    settings.PROFILING = {
+        "ENABLED": True,
+        "TOKEN": "secret",
+        "INTERVAL": 0.001,
+        "OUTPUT_DIR": tmp_path,
+    }
+    get_queryset = PostListAPIView.get_queryset
+
+    def slow_get_queryset(self):
+        time.sleep(0.05)
+        return get_queryset(self)
+
+    monkeypatch.setattr(PostListAPIView, "get_queryset", slow_get_queryset)
+    client = APIClient()
+
+    response = client.get("/api/post/list/")
+    assert "X-Profile-Samples" not in response
+    assert not list(tmp_path.iterdir())
+
+    response = client.get("/api/post/list/", HTTP_X_PROFILE="secret")
+    assert int(response["X-Profile-Samples"]) > 0
+    lines = (tmp_path / "postlist.collapsed").read_text().splitlines()
+    assert all(line.startswith("core.profiling:__call__;") for line in lines)
+    assert any("core.tests:slow_get_queryset" in line for line in lines)
+
+
+def test_sampler_runs_in_forked_children():
+    """
+    A sampler created before a fork, as with gunicorn's preload_app, starts
+    its own thread in the child on the first request.
+    """
+    import os
+    import threading
+    import time
+
+    from core.profiling import Sampler
+
+    sampler = Sampler(0.001, root=None)
+    pid = os.fork()
+    if pid == 0:
+        samples = 0
+        try:
+            sampler.start(threading.get_ident())
+            time.sleep(0.05)
+            samples = sum(sampler.stop(threading.get_ident()).values())
+        finally:
+            os._exit(0 if samples else 1)
+    assert os.waitpid(pid, 0)[1] == 0
+
+
+# ---------------------------------------------------------------------------------------
+def test_query_fingerprint_ignores_values():
+    from core.querylog import fingerprint
+
+    first = fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a'")
+    second = fingerprint("SELECT *  FROM t WHERE id IN (%s) AND name = %s")
+
+    assert first == second
+    assert first[1] == "SELECT * FROM t WHERE id IN (...) AND name = ?"
+
+
+@pytest.mark.django_db
+def test_slow_query_log_aggregates_and_explains(user, multiple_posts, settings):
+    """
+    With the log enabled, queries over the threshold are aggregated per
+    fingerprint with their call site and the plan of the first sighting.
+    """
+    from core.querylog import query_log
+
+    settings.SLOW_QUERY_LOG = {"ENABLED": True, "THRESHOLD_MS": 0, "EXPLAIN": True}
+    query_log.reset()
+    client = APIClient()
+    client.get("/api/post/list/")
+    client.get("/api/post/list/")
+
+    admin = User.objects.create_superuser(
+        email="admin@example.com", first_name="A", last_name="B", gender="F"
+    )
+    client.force_authenticate(user=admin)
+    queries = client.get("/api/debug/slow-queries/").data["queries"]
+
+    posts = next(q for q in queries if q["sql"].startswith('SELECT "core_post"'))
+    assert posts["count"] == 2
+    # The project frame that evaluated the queryset, not Django internals.
+    assert all(
+        site.startswith(("core/", "authentication/")) for site in posts["call_sites"]
+    )
+    assert posts["explain"]
+
+    assert client.delete("/api/debug/slow-queries/").status_code == 204
+    assert query_log.export() == []
+
+
+# ---------------------------------------------------------------------------------------
+def test_startup_does_not_import_celery():
+    """
+    The Celery app is loaded lazily, so django.setup() (every WSGI worker and
+    management command) does not import celery or kombu.
+    """
+    import os
+    import subprocess
+    import sys
+
+    from core.management.commands.bench_startup import parse_importtime
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import django, sys; django.setup(); "
+            "assert 'celery' not in sys.modules, 'celery imported'; "
+            "import SocialApp; assert SocialApp.celery_app.main == 'SocialApp'",
+        ],
+        env=dict(os.environ, DJANGO_SETTINGS_MODULE="SocialApp.settings"),
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr[-500:]
+    assert parse_importtime(result.stderr)["django"] > 0
+
+
+# ---------------------------------------------------------------------------------------
+@pytest.mark.django_db
+def test_list_responses_are_compressed(user, settings):
+    """
+    JSON responses over MIN_SIZE are compressed with the best encoding the
+    client accepts; small ones and clients without Accept-Encoding are not.
+    """
+    import gzip
+
+    import brotli
+
+    for i in range(30):
+        Post.objects.create(user=user, title=f"Post {i}", content="Lorem ipsum " * 10)
+    client = APIClient()
+
+    plain = client.get("/api/post/list/")
+    assert "Content-Encoding" not in plain
+
+    response = client.get("/api/post/list/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert gzip.decompress(response.content) == plain.content
+
+    response = client.get("/api/post/list/", HTTP_ACCEPT_ENCODING="gzip;q=0.5, br")
+    assert response["Content-Encoding"] == "br"
+    assert brotli.decompress(response.content) == plain.content
+
+    response = client.get("/api/post/list/?limit=1", HTTP_ACCEPT_ENCODING="gzip")
+    assert "Content-Encoding" not in response
+
+
+def test_streaming_responses_are_compressed(rf):
+    import zlib
+
+    from django.http import StreamingHttpResponse
+
+    from core.compression import CompressionMiddleware
+
+    chunks = [b'{"id": %d, "title": "streamed"},' % i for i in range(100)]
+    middleware = CompressionMiddleware(
+        lambda request: StreamingHttpResponse(
+            iter(chunks), content_type="application/json"
+        )
+    )
+
+    response = middleware(rf.get("/", HTTP_ACCEPT_ENCODING="gzip"))
+
+    assert response["Content-Encoding"] == "gzip"
+    decompressor = zlib.decompressobj(31)
+    # Each chunk can be decoded as soon as it arrives.
+    first = next(iter(response.streaming_content))
+    assert decompressor.decompress(first) == chunks[0]
+    body = first + b"".join(response.streaming_content)
+    assert zlib.decompress(body, 31) == b"".join(chunks)
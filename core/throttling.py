@@ -0,0 +1,152 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from .backends import cached_setting, load_backend
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a DRF style rate such as ``"30/min"`` into ``(refill per second,
+    bucket capacity)``. The capacity equals the number of requests, so a
+    client can burst up to a full period's allowance.
+    """
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity / DURATIONS[period[0]], capacity
+
+
+class LocalTokenBucketBackend:
+    """
+    Token buckets kept in process memory. Limits are per worker process, which
+    is fine for a single process or as a rough guard; use the Redis backend
+    for limits shared between workers.
+
+    Buckets are kept in least recently used order. Beyond ``max_keys``, the
+    least recently used ones that have refilled (and so behave exactly like
+    missing ones) are dropped, then more of the oldest if still needed, so
+    memory stays bounded.
+    """
+
+    max_keys = 100000
+
+    def __init__(self, **options):
+        # key -> (tokens, last update, time the bucket is full again)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, capacity):
+        """
+        Take one token from ``key``'s bucket. Return 0 when the request is
+        allowed, otherwise the seconds until a token is available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp, _ = self._buckets.pop(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        # Each bucket is popped at most once, so this is amortised O(1).
+        buckets = self._buckets
+        while buckets and next(iter(buckets.values()))[2] <= now:
+            buckets.popitem(last=False)
+        while len(buckets) > self.max_keys:
+            buckets.popitem(last=False)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisTokenBucketBackend:
+    """
+    Token buckets in Redis, updated atomically by a Lua script so all workers
+    share one limit. Uses the Redis server clock.
+    """
+
+    script = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local clock = redis.call("TIME")
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+    redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url="redis://localhost:6379/0", prefix="throttle:", **options):
+        import redis
+
+        self.client = redis.Redis.from_url(url, **options)
+        self.prefix = prefix
+        self._consume = self.client.register_script(self.script)
+
+    def consume(self, key, rate, capacity):
+        return float(self._consume(keys=[self.prefix + key], args=[rate, capacity]))
+
+    def reset(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+@cached_setting("TOKEN_BUCKET_THROTTLE")
+def get_config():
+    """
+    Return ``(backend, {url name: (rate, capacity)})`` built from the
+    TOKEN_BUCKET_THROTTLE setting.
+    """
+    config = getattr(settings, "TOKEN_BUCKET_THROTTLE", {})
+    backend = load_backend(config, "core.throttling.LocalTokenBucketBackend")
+    rates = {name: parse_rate(rate) for name, rate in config.get("RATES", {}).items()}
+    return backend, rates
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket throttle for the URL names listed in
+    TOKEN_BUCKET_THROTTLE["RATES"]. Buckets are per user for authenticated
+    requests and per client IP otherwise. Other URLs are not throttled.
+    """
+
+    def allow_request(self, request, view):
+        match = request.resolver_match
+        backend, rates = get_config()
+        if match is None or match.url_name not in rates:
+            return True
+        rate, capacity = rates[match.url_name]
+        user = request.user
+        if user and user.is_authenticated:
+            ident = f"user:{user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        self._wait = backend.consume(f"{match.url_name}:{ident}", rate, capacity)
+        return self._wait == 0
+
+    def wait(self):
+        # Retry-After only accepts whole seconds.
+        return math.ceil(self._wait)
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from core.views import (
+    BatchAPIView,
     CommentCreateAPIView,
     CommentDeleteAPIView,
     CommentListAPIView,
@@ -17,13 +18,12 @@ from core.views import (
     PostListAPIView,
     PostRetrieveAPIView,
     PostUpdateAPIView,
-    # StudentByEmailAPIView,
-    # StudentByNameAPIView,
-    # StudentEnrolledSubjectAPIView,
-    # StudentFilterAPIView,
-    # StudentLearnByTeacherAPIView,
-    # StudentsExcludingSAPIView,
-    # TotalStudentsAPIView,
+    SlowQueryAPIView,
+    StudentByEmailAPIView,
+    StudentFilterAPIView,
+    StudentImportAPIView,
+    StudentLearnByTeacherAPIView,
+    TotalStudentsAPIView,
 )
 
 urlpatterns = [
@@ -65,4 +65,19 @@ urlpatterns = [
     path("like/create/", LikeCreateAPIView.as_view(), name="likecreate"),
     path("like/get/<uuid:pk>/", LikeRetrieveAPIView.as_view(), name="likeget"),
     path("like/list/", LikeListAPIView.as_view(), name="likelist"),
+    path("students/", StudentFilterAPIView.as_view(), name="studentlist"),
+    path(
+        "student/email/<str:email>/",
+        StudentByEmailAPIView.as_view(),
+        name="studentbyemail",
+    ),
+    path(
+        "students/teacher/<int:pk>/",
+        StudentLearnByTeacherAPIView.as_view(),
+        name="studentsbyteacher",
+    ),
+    path("students/total/", TotalStudentsAPIView.as_view(), name="totalstudents"),
+    path("students/import/", StudentImportAPIView.as_view(), name="studentimport"),
+    path("batch/", BatchAPIView.as_view(), name="batch"),
+    path("debug/slow-queries/", SlowQueryAPIView.as_view(), name="slowqueries"),
 ]
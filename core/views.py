@@ -1,4 +1,12 @@
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import (
     CreateAPIView,
     DestroyAPIView,
@@ -6,14 +14,17 @@ from rest_framework.generics import (
     RetrieveAPIView,
     UpdateAPIView,
 )
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-# from rest_framework.views import APIView
+from rest_framework.views import APIView
 
 from authentication.models import User
 
 # from core.CustomPagination import CustomPagination
+from core.CustomPagination import CachedCountPagination, DirectoryPagination
 from core.serializers import (
+    ArchivedCommentSerializer,
     CommentSerializer,
     FollowersSerializer,
     FollowingsSerializer,
@@ -21,11 +32,34 @@ from core.serializers import (
     LikeSerializer,
     PostGetSerializer,
     PostSerializer,
+    StudentDirectorySerializer,
 )
 
-from .models import Comment, Follow, Like, Post
+from . import deletion, outbox
+from .archive import archive_cutoff, count_with_archive
+from .batch import BatchError, run_batch
+from .conditional import (
+    conditional,
+    followers_validators,
+    followings_validators,
+    post_comments_validators,
+    post_validators,
+)
+from .idempotency import idempotent
+from .importers import import_students, iter_rows
+from .models import (
+    ArchivedComment,
+    ArchivedLike,
+    Comment,
+    Course,
+    Follow,
+    Like,
+    Post,
+    Student,
+    Teacher,
+)
 from .permissions import IsOwnerOrReadOnly
-from .tasks import send_comment_creation_email
+from .querylog import query_log
 
 # from django.shortcuts import get_object_or_404
 
@@ -38,6 +72,7 @@ class PostCreateAPIView(CreateAPIView):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         if "user" not in request.data:
             request.data["user"] = request.user.id
@@ -87,6 +122,10 @@ class PostRetrieveAPIView(RetrieveAPIView):
     serializer_class = PostGetSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return PostGetSerializer.optimize_queryset(super().get_queryset(), self.request)
+
+    @conditional(post_validators)
     def get(self, request, pk, *args, **kwargs):
         # post = Post.objects.filter(pk=pk).first()
         post = self.get_object()
@@ -110,6 +149,9 @@ class PostListAPIView(ListAPIView):
     serializer_class = PostGetSerializer
     # permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return PostGetSerializer.optimize_queryset(super().get_queryset(), self.request)
+
 
 class PostUpdateAPIView(UpdateAPIView):
     """ "
@@ -181,7 +223,8 @@ class PostDeleteAPIView(DestroyAPIView):
         post = self.get_object()
 
         if post:
-            post.delete()
+            # Likes and comments are purged in the background.
+            deletion.soft_delete_post(post)
             return Response(
                 {"msg": "Post Deleted Successfully!"},
                 status=status.HTTP_200_OK,
@@ -201,22 +244,30 @@ class PostCommentsListAPIView(ListAPIView):
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
 
+    @conditional(post_comments_validators)
     def get(self, request, pk, *args, **kwargs):
         likes = comments = 0
         post_data = {}
 
+        if not Post.objects.filter(pk=pk).exists():
+            return Response(
+                {"errors": {"msg": "Invalid Post Id!"}},
+                status=status.HTTP_404_NOT_FOUND,
+            )
         all_comments = Comment.objects.filter(post=pk)
         if all_comments is not None:
             comment_serializer = CommentSerializer(all_comments, many=True)
-            comments = all_comments.count()
-            post_data["Count Of Comments"] = all_comments.count()
-            post_data["Comments"] = comment_serializer.data
+            # Older comments may have been moved to the archive.
+            archived_serializer = ArchivedCommentSerializer(
+                ArchivedComment.objects.filter(post=pk), many=True
+            )
+            comment_data = comment_serializer.data + archived_serializer.data
+            comments = len(comment_data)
+            post_data["Count Of Comments"] = comments
+            post_data["Comments"] = comment_data
 
-        all_likes = Like.objects.filter(post=pk)
-        if all_likes is not None:
-            like_serializer = LikeSerializer(all_likes, many=True)
-            likes = len(like_serializer.data)
-            post_data["Count Of Likes"] = likes
+        likes = count_with_archive(Like, post=pk)
+        post_data["Count Of Likes"] = likes
 
         if likes == 0 and comments == 0:
             return Response(
@@ -237,7 +288,7 @@ class CommentListAPIView(ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk, *args, **kwargs):
-        comments = Comment.objects.filter(user=pk)
+        comments = Comment.objects.filter(user=pk, post__deleted_at=None)
         if comments:
             serializer = self.get_serializer(comments, many=True)
             return Response(
@@ -289,6 +340,7 @@ class CommentCreateAPIView(CreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         if "user" not in request.data:
             request.data["user"] = request.user.id
@@ -301,11 +353,13 @@ class CommentCreateAPIView(CreateAPIView):
 
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            comment = serializer.save()
-            # Trigger the comment creation email task asynchronously using Celery
-            send_comment_creation_email.delay(
-                comment.id
-            )  # This sends email in the background
+            with transaction.atomic():
+                comment = serializer.save()
+                # The email task is published by the outbox relay once the
+                # comment is committed, so the broker is never on this path.
+                outbox.enqueue(
+                    "core.tasks.send_comment_creation_email", str(comment.uuid)
+                )
             return Response(
                 {"msg": "Comment Created Successfully!"},
                 status=status.HTTP_201_CREATED,
@@ -327,7 +381,13 @@ class CommentDeleteAPIView(DestroyAPIView):
         comment = self.get_object()
 
         if comment:
-            comment.delete()
+            with transaction.atomic():
+                comment.delete()
+                # A delete leaves no timestamp behind; bump the post so the
+                # Last-Modified of its comment lists moves forward.
+                Post.objects.filter(pk=comment.post_id).update(
+                    updated_at=timezone.now()
+                )
             return Response(
                 {"msg": "comment Deleted Successfully!"},
                 status=status.HTTP_200_OK,
@@ -376,6 +436,7 @@ class FollowersListAPIView(ListAPIView):
     serializer_class = FollowersSerializer
     permission_classes = [IsAuthenticated]
 
+    @conditional(followers_validators)
     def get(self, request, pk, *args, **kwargs):
         followers = Follow.objects.filter(user_following=pk)
         if followers:
@@ -420,6 +481,7 @@ class FollowingListAPIView(ListAPIView):
     # serializer_class = FollowingsSerializer
     permission_classes = [IsAuthenticated]
 
+    @conditional(followings_validators)
     def get(self, request, pk, *args, **kwargs):
         following = Follow.objects.filter(user=pk)
         if following:
@@ -484,8 +546,11 @@ class LikeCreateAPIView(CreateAPIView):
         user_id = int(request.data["user"])
         post_id = request.data["post"]
 
-        # Check if the like already exists.
-        likes = Like.objects.filter(user=user_id, post=post_id).exists()
+        # Check if the like already exists, including archived likes.
+        likes = (
+            Like.objects.filter(user=user_id, post=post_id).exists()
+            or ArchivedLike.objects.filter(user=user_id, post=post_id).exists()
+        )
 
         if likes:
             return Response({"msg": "Already Liked!"}, status=status.HTTP_200_OK)
@@ -505,12 +570,12 @@ class LikeRetrieveAPIView(RetrieveAPIView):
     This view is used to get the specified Like details
     """
 
-    queryset = Like.objects.all()
+    queryset = Like.objects.filter(post__deleted_at=None)
     serializer_class = LikeSerializer
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk, *args, **kwargs):
-        like = Like.objects.filter(pk=pk).first()
+        like = self.get_queryset().filter(pk=pk).first()
         if like is not None:
             serializer = self.get_serializer(like)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -522,8 +587,243 @@ class LikeRetrieveAPIView(RetrieveAPIView):
 
 class LikeListAPIView(ListAPIView):
     """
-    This view will show all the likes on post"""
+    This view will show the likes of a post (?post=) or a user (?user=),
+    defaulting to the requesting user's likes, optionally limited to
+    ?since= / ?until= (ISO 8601), newest first. Ranges reaching back past
+    the archive cutoff include the archived likes.
+    """
 
-    queryset = Like.objects.all()
+    queryset = Like.objects.order_by("-created_at")
     serializer_class = LikeSerializer
-    permission_classes = [IsAuthenticated]
\ No newline at end of file
+    pagination_class = CachedCountPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        params = self.request.query_params
+        filters = {}
+        try:
+            if "post" in params:
+                filters["post"] = uuid.UUID(params["post"])
+            if "user" in params:
+                filters["user"] = int(params["user"])
+        except ValueError:
+            raise ValidationError("post must be a UUID and user an integer.")
+        if not filters:
+            filters["user"] = self.request.user
+        # Soft-deleted posts' likes stay hidden until the purge removes them.
+        filters["post__deleted_at"] = None
+        for param, lookup in (
+            ("since", "created_at__gte"),
+            ("until", "created_at__lt"),
+        ):
+            if param in params:
+                try:
+                    moment = parse_datetime(params[param])
+                except ValueError:
+                    moment = None
+                if moment is None:
+                    raise ValidationError({param: "Expected an ISO 8601 datetime."})
+                if timezone.is_naive(moment):
+                    moment = timezone.make_aware(moment)
+                filters[lookup] = moment
+
+        # Only rows created before the cutoff can have been archived, but
+        # some of those may still be waiting in the hot table.
+        since = filters.get("created_at__gte")
+        self.combined = since is None or since < archive_cutoff()
+        queryset = super().get_queryset().filter(**filters)
+        if not self.combined:
+            return queryset
+        columns = ["uuid", "user_id", "post_id", "created_at"]
+        archived = ArchivedLike.objects.filter(**filters).values(*columns)
+        return (
+            queryset.order_by()
+            .values(*columns)
+            .union(archived, all=True)
+            .order_by("-created_at")
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.combined:
+            page = [Like(**row) for row in page]
+        return page
+
+
+class StudentFilterAPIView(ListAPIView):
+    """
+    This view lists students, optionally filtered by course, teacher or email.
+    Courses and their teachers are prefetched, so a page costs a fixed number
+    of queries whatever its size.
+    """
+
+    queryset = Student.objects.prefetch_related(
+        Prefetch("courses", queryset=Course.objects.select_related("teacher"))
+    ).order_by("id")
+    serializer_class = StudentDirectorySerializer
+    pagination_class = DirectoryPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        try:
+            course = int(params["course"]) if "course" in params else None
+            teacher = int(params["teacher"]) if "teacher" in params else None
+        except ValueError:
+            raise ValidationError("course and teacher must be integers.")
+        if "email" in params:
+            queryset = queryset.filter(email__iexact=params["email"])
+        if course is not None:
+            queryset = queryset.filter(courses=course)
+        if teacher is not None:
+            # A student can take several courses of one teacher.
+            queryset = queryset.filter(courses__teacher=teacher).distinct()
+        return queryset
+
+
+class StudentByEmailAPIView(StudentFilterAPIView):
+    """
+    This view returns the student with the given email
+    """
+
+    pagination_class = None
+
+    def get(self, request, email, *args, **kwargs):
+        student = self.get_queryset().filter(email__iexact=email).first()
+        if student is not None:
+            serializer = self.get_serializer(student)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            {"errors": {"msg": "No Student with this Email!"}},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+
+class StudentLearnByTeacherAPIView(StudentFilterAPIView):
+    """
+    This view lists the students taking any course of the given teacher
+    """
+
+    def get_queryset(self):
+        return (
+            super().get_queryset().filter(courses__teacher=self.kwargs["pk"]).distinct()
+        )
+
+
+class TotalStudentsAPIView(APIView):
+    """
+    This view returns student totals overall, per course and per teacher.
+    Every count comes from one annotated query.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        courses = (
+            Course.objects.annotate(total_students=Count("students"))
+            .values("id", "name", "teacher", "total_students")
+            .order_by("id")
+        )
+        teachers = (
+            Teacher.objects.annotate(
+                total_courses=Count("courses", distinct=True),
+                total_students=Count("courses__students", distinct=True),
+            )
+            .values("id", "name", "total_courses", "total_students")
+            .order_by("id")
+        )
+        return Response(
+            {
+                "total_students": Student.objects.count(),
+                "courses": list(courses),
+                "teachers": list(teachers),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class StudentImportAPIView(APIView):
+    """
+    This view upserts students and enrollments from an uploaded CSV or JSONL
+    file. The upload is parsed as a stream and written in bulk chunks.
+    """
+
+    parser_classes = [MultiPartParser]
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"errors": {"msg": "A file is required!"}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        fmt = request.data.get("format") or upload.name.rsplit(".", 1)[-1].lower()
+        if fmt not in ("csv", "jsonl"):
+            return Response(
+                {"errors": {"msg": "Format must be csv or jsonl!"}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        report = import_students(iter_rows(upload.file, fmt))
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+
+class BatchAPIView(APIView):
+    """
+    This view runs several GET requests against the API in one round trip.
+    The body is {"requests": [{"path": "post/get/<id>/"}, ...], "parallel":
+    false}; the response lists each sub-request's status and body in order.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        specs = request.data.get("requests")
+        if not isinstance(specs, list) or not all(
+            isinstance(spec, dict) and isinstance(spec.get("path"), str)
+            for spec in specs
+        ):
+            return Response(
+                {"errors": {"msg": "requests must be a list of {path} objects!"}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if any(spec.get("method", "GET").upper() != "GET" for spec in specs):
+            return Response(
+                {"errors": {"msg": "Only GET requests can be batched!"}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            responses = run_batch(
+                request,
+                [spec["path"] for spec in specs],
+                parallel=bool(request.data.get("parallel")),
+            )
+        except BatchError as exc:
+            return Response(
+                {"errors": {"msg": str(exc)}}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"responses": responses}, status=status.HTTP_200_OK)
+
+
+class SlowQueryAPIView(APIView):
+    """
+    This view exports this process's slow query aggregates as JSON, slowest
+    total first; DELETE clears them.
+    """
+
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(
+            {
+                "enabled": settings.SLOW_QUERY_LOG.get("ENABLED", False),
+                "threshold_ms": settings.SLOW_QUERY_LOG.get("THRESHOLD_MS"),
+                "queries": query_log.export(),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def delete(self, request, *args, **kwargs):
+        query_log.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,62 @@
+# Production server configuration, picked up by `gunicorn` from the project
+# directory. Every value can be overridden with a GUNICORN_* variable.
+#
+#   gunicorn                                         # gthread workers, WSGI
+#   GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn   # ASGI
+#
+# See core/management/commands/bench_server.py to compare worker classes.
+
+import gc
+import multiprocessing
+import os
+
+# Freeze-friendly preloading: the master imports Django and the URLconf once
+# and forks workers that share those pages. Collections would touch every
+# object header and unshare the pages, so the collector is off while the app
+# loads and back on once the preloaded objects are frozen out of it.
+gc.disable()
+
+cores = multiprocessing.cpu_count()
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+asgi = "uvicorn" in worker_class.lower()
+
+wsgi_app = "SocialApp.asgi:application" if asgi else "SocialApp.wsgi:application"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+preload_app = True
+
+# Sync workers block on every DB call, so they need more processes; gthread
+# and uvicorn workers overlap I/O inside each process.
+if worker_class == "sync":
+    default_workers = 2 * cores + 1
+else:
+    default_workers = cores + 1
+workers = int(os.getenv("GUNICORN_WORKERS", default_workers))
+threads = int(os.getenv("GUNICORN_THREADS", 4 if worker_class == "gthread" else 1))
+
+# Recycle workers now and then to cap slow memory growth; the jitter keeps
+# them from restarting all at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Heartbeat files on tmpfs, so a slow disk cannot get workers killed.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG")
+errorlog = "-"
+
+
+def when_ready(server):
+    # Import the URLconf (views, serializers, DRF) before forking too; Django
+    # would otherwise load it in every worker on the first request.
+    if server.cfg.preload_app:
+        from django.urls import get_resolver
+
+        get_resolver().url_patterns
+    gc.freeze()
+    # Runs before the first fork, so the workers inherit the collector on.
+    gc.enable()